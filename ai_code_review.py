@@ -3,7 +3,13 @@ import subprocess
 import json
 import sys
 import os
+import re
 import configparser
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import git_metadata
 
 # ANSI color codes
 class Colors:
@@ -45,19 +51,137 @@ SYSTEM_PROMPT = """You are a senior code reviewer performing a thorough code rev
 - MEDIUM: Code smells, potential bugs, missing error handling
 - LOW: Minor improvements, suggestions, style inconsistencies"""
 
-def get_branch_diff():
-    """Get the diff of changed files in current branch vs main branch."""
+REVIEW_MODEL = "gpt-4o"
+
+SEVERITIES = ['critical', 'high', 'medium', 'low']
+SEVERITY_STYLES = {
+    'critical': (Colors.CRITICAL, '🔴'),
+    'high': (Colors.HIGH, '🟡'),
+    'medium': (Colors.MEDIUM, '🔵'),
+    'low': (Colors.LOW, '🟢'),
+}
+
+REVIEW_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'ai_reviews.json')
+review_state_lock = threading.Lock()
+
+def load_review_state():
+    """Load head SHAs last reviewed per merge request, keyed by 'project_id:mr_id'."""
     try:
-        # Get main branch name
-        main_branch = subprocess.check_output(
-            "git symbolic-ref refs/remotes/origin/HEAD | sed 's@^refs/remotes/origin/@@'",
-            shell=True, text=True, stderr=subprocess.STDOUT
-        ).strip()
+        with open(REVIEW_STATE_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_reviewed_sha(project_id, mr_id, sha):
+    # Batch review saves from several threads, each must see the others' updates
+    with review_state_lock:
+        state = load_review_state()
+        state[f"{project_id}:{mr_id}"] = sha
+        os.makedirs(os.path.dirname(REVIEW_STATE_PATH), exist_ok=True)
+        tmp_path = f"{REVIEW_STATE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, REVIEW_STATE_PATH)
+
+def get_head_sha():
+    sha = git_metadata.resolve_ref('HEAD')
+    if sha:
+        return sha
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True).strip()
     except subprocess.CalledProcessError:
-        main_branch = 'master'
+        return None
+
+def is_ancestor_of_head(sha):
+    """Check that sha is still part of current branch history (not rewritten by rebase or force push)."""
+    result = subprocess.run(['git', 'merge-base', '--is-ancestor', sha, 'HEAD'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0
+
+MAX_FILE_DIFF_BYTES = 64 * 1024
+MAX_TOTAL_DIFF_BYTES = 512 * 1024
+
+def iter_diff_files(diff_range, max_file_bytes=MAX_FILE_DIFF_BYTES):
+    """Yield one record per changed file of `git diff diff_range`, reading git output lazily.
 
+    Record is dict with 'path', 'header' and 'hunks' (lists of text), 'additions', 'deletions'
+    and 'truncated'. Lines beyond max_file_bytes of a file are counted but not kept, so memory
+    stays bounded by the largest kept file, not by the whole diff.
+    """
+    process = subprocess.Popen(['git', 'diff', diff_range], stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True, errors='replace')
+    record = None
+    in_header = False
     try:
-        current_branch = subprocess.check_output(
+        for line in process.stdout:
+            if line.startswith('diff --git '):
+                if record:
+                    yield record
+                record = {
+                    'path': line.rstrip('\n')[len('diff --git a/'):].split(' b/')[0],
+                    'header': [line],
+                    'hunks': [],
+                    'additions': 0,
+                    'deletions': 0,
+                    'truncated': False,
+                    'size': len(line),
+                }
+                in_header = True
+                continue
+            if record is None:
+                continue
+
+            if in_header and not line.startswith('@@'):
+                # File header (index, mode, ---/+++ lines, binary notice)
+                if line.startswith('+++ b/'):
+                    record['path'] = line.rstrip('\n')[len('+++ b/'):]
+                record['header'].append(line)
+                record['size'] += len(line)
+                continue
+            in_header = False
+
+            if line.startswith('+'):
+                record['additions'] += 1
+            elif line.startswith('-'):
+                record['deletions'] += 1
+
+            if record['truncated'] or record['size'] + len(line) > max_file_bytes:
+                record['truncated'] = True
+                continue
+            record['size'] += len(line)
+            if line.startswith('@@'):
+                record['hunks'].append(line)
+            else:
+                record['hunks'][-1] += line
+
+        if record:
+            yield record
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        returncode = process.wait()
+
+    if returncode not in (0, -9):
+        raise subprocess.CalledProcessError(returncode, ['git', 'diff', diff_range])
+
+def format_diff_record(record, include_hunks=True):
+    """Render a diff record back to unified diff text, noting what was left out."""
+    text = ''.join(record['header'])
+    if not include_hunks:
+        return text + f"[diff omitted: +{record['additions']} -{record['deletions']} lines, review size limit reached]\n"
+    text += ''.join(record['hunks'])
+    if record['truncated']:
+        text += f"[diff truncated: file has +{record['additions']} -{record['deletions']} lines in total]\n"
+    return text
+
+def get_branch_diff(since_sha=None):
+    """Get the diff of changed files in current branch vs main branch, or only since since_sha if given."""
+    # Get main branch name
+    main_branch = git_metadata.remote_head_branch() or 'master'
+
+    try:
+        current_branch = git_metadata.current_branch() or subprocess.check_output(
             ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
             text=True
         ).strip()
@@ -66,12 +190,15 @@ def get_branch_diff():
             print(f"{Colors.HIGH}⚠ You are on the main branch ({main_branch}). No changes to review.{Colors.RESET}")
             return None
 
-        # Get diff of changed files only
-        diff_output = subprocess.check_output(
-            ['git', 'diff', f'{main_branch}...HEAD'],
-            text=True,
-            stderr=subprocess.DEVNULL
-        )
+        # Get diff of changed files only, file by file so huge diffs are cut early
+        diff_range = f'{since_sha}..HEAD' if since_sha else f'{main_branch}...HEAD'
+        parts = []
+        total_size = 0
+        for record in iter_diff_files(diff_range):
+            part = format_diff_record(record, include_hunks=total_size < MAX_TOTAL_DIFF_BYTES)
+            total_size += len(part)
+            parts.append(part)
+        diff_output = ''.join(parts)
 
         if not diff_output.strip():
             print(f"{Colors.INFO}ℹ No changes detected between {current_branch} and {main_branch}{Colors.RESET}")
@@ -83,6 +210,52 @@ def get_branch_diff():
         print(f"{Colors.CRITICAL}✗ Error getting git diff: {e}{Colors.RESET}")
         return None
 
+def change_to_diff_record(change, max_file_bytes=MAX_FILE_DIFF_BYTES):
+    """Turn one entry of GitLab MR changes into the same record iter_diff_files yields."""
+    old_path = change.get('old_path') or change.get('new_path')
+    new_path = change.get('new_path') or old_path
+    header = [
+        f"diff --git a/{old_path} b/{new_path}\n",
+        "--- /dev/null\n" if change.get('new_file') else f"--- a/{old_path}\n",
+        "+++ /dev/null\n" if change.get('deleted_file') else f"+++ b/{new_path}\n",
+    ]
+    record = {
+        'path': new_path,
+        'header': header,
+        'hunks': [],
+        'additions': 0,
+        'deletions': 0,
+        'truncated': False,
+        'size': sum(len(line) for line in header),
+    }
+
+    for line in (change.get('diff') or '').splitlines(keepends=True):
+        if line.startswith('+'):
+            record['additions'] += 1
+        elif line.startswith('-'):
+            record['deletions'] += 1
+
+        if record['truncated'] or record['size'] + len(line) > max_file_bytes:
+            record['truncated'] = True
+            continue
+        record['size'] += len(line)
+        if line.startswith('@@') or not record['hunks']:
+            record['hunks'].append(line)
+        else:
+            record['hunks'][-1] += line
+    return record
+
+def build_diff_from_changes(changes):
+    """Unified diff text of MR changes, with the same per-file and total limits as get_branch_diff."""
+    parts = []
+    total_size = 0
+    for change in changes:
+        record = change_to_diff_record(change)
+        part = format_diff_record(record, include_hunks=total_size < MAX_TOTAL_DIFF_BYTES)
+        total_size += len(part)
+        parts.append(part)
+    return ''.join(parts)
+
 def get_openai_client():
     """Initialize OpenAI client with API key from config."""
     config = configparser.ConfigParser()
@@ -104,32 +277,156 @@ def get_openai_client():
         print(f"{Colors.DIM}  Install: pip install openai{Colors.RESET}")
         return None
 
-def review_code(diff_content):
-    """Send code diff to OpenAI for review."""
-    openai = get_openai_client()
+def build_review_messages(diff_content):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Review this git diff:\n\n{diff_content}"}
+    ]
+
+def review_code(diff_content, client=None, model=REVIEW_MODEL, stats=None):
+    """Send code diff to OpenAI (or compatible client) for review.
+
+    If stats dict is given, it is filled with token usage and whether the response parsed.
+    """
+    openai = client or get_openai_client()
     if not openai:
         return None
 
     try:
         response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": f"Review this git diff:\n\n{diff_content}"}
-            ],
+            model=model,
+            messages=build_review_messages(diff_content),
             temperature=0.3,
             response_format={"type": "json_object"}
         )
 
+        if stats is not None:
+            usage = getattr(response, 'usage', None)
+            stats['prompt_tokens'] = getattr(usage, 'prompt_tokens', None)
+            stats['completion_tokens'] = getattr(usage, 'completion_tokens', None)
+            stats['parse_error'] = False
         return json.loads(response.choices[0].message.content)
     except json.JSONDecodeError as e:
+        if stats is not None:
+            stats['parse_error'] = True
         print(f"{Colors.CRITICAL}✗ Failed to parse AI response as JSON{Colors.RESET}")
         print(f"{Colors.DIM}Error: {e}{Colors.RESET}")
         return None
     except Exception as e:
+        if stats is not None:
+            stats['error'] = str(e)
         print(f"{Colors.CRITICAL}✗ Error during AI review: {e}{Colors.RESET}")
         return None
 
+class StreamingFindingsParser:
+    """Incrementally extract findings from streamed review JSON as soon as each one is complete.
+
+    Expects the SYSTEM_PROMPT output format: a top-level object whose severity keys hold
+    arrays of finding objects. Each character is scanned once, and only the unfinished part
+    (open finding or key) is kept in buffer, so parsing stays linear in response length.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.buffer = ''
+        self.position = 0
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_key = None
+        self.finding_start = None
+
+    @property
+    def text(self):
+        """Whole response received so far."""
+        return ''.join(self.chunks)
+
+    def feed(self, chunk):
+        """Add streamed text and return list of (severity, finding) completed by it."""
+        self.chunks.append(chunk)
+        self.buffer += chunk
+        completed = []
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if len(self.stack) == 1:
+                        self.last_key = self.buffer[self.string_start + 1:self.position]
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.position
+            elif char in '{[':
+                if char == '{' and self.stack == ['{', '[']:
+                    self.finding_start = self.position
+                self.stack.append(char)
+            elif char in '}]' and self.stack:
+                self.stack.pop()
+                if char == '}' and self.stack == ['{', '['] and self.finding_start is not None:
+                    try:
+                        finding = json.loads(self.buffer[self.finding_start:self.position + 1])
+                        if self.last_key in SEVERITIES:
+                            completed.append((self.last_key, finding))
+                    except json.JSONDecodeError:
+                        pass
+                    self.finding_start = None
+            self.position += 1
+
+        # Drop scanned text that no open finding or key still needs
+        keep = min([self.position]
+                   + ([self.finding_start] if self.finding_start is not None else [])
+                   + ([self.string_start] if self.in_string else []))
+        if self.finding_start is not None:
+            self.finding_start -= keep
+        if self.in_string:
+            self.string_start -= keep
+        self.buffer = self.buffer[keep:]
+        self.position -= keep
+        return completed
+
+def review_code_streaming(diff_content, on_finding):
+    """Send code diff to OpenAI for review, calling on_finding(severity, issue) as each finding streams in."""
+    openai = get_openai_client()
+    if not openai:
+        return None
+
+    parser = StreamingFindingsParser()
+    results = {severity: [] for severity in SEVERITIES}
+    try:
+        stream = openai.chat.completions.create(
+            model=REVIEW_MODEL,
+            messages=build_review_messages(diff_content),
+            temperature=0.3,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if not content:
+                continue
+            for severity, issue in parser.feed(content):
+                results[severity].append(issue)
+                on_finding(severity, issue)
+    except Exception as e:
+        print(f"{Colors.CRITICAL}✗ Error during AI review: {e}{Colors.RESET}")
+        return None
+
+    # Summary is only known once the whole response is there
+    try:
+        results['summary'] = json.loads(parser.text).get('summary', '')
+    except json.JSONDecodeError as e:
+        print(f"{Colors.HIGH}⚠ Failed to parse complete AI response as JSON, keeping streamed findings{Colors.RESET}")
+        print(f"{Colors.DIM}Error: {e}{Colors.RESET}")
+    return results
+
 def print_issues(issues, severity, color, icon):
     """Print issues with consistent formatting."""
     if not issues:
@@ -143,6 +440,15 @@ def print_issues(issues, severity, color, icon):
         print(f"  {color}•{Colors.RESET} {Colors.BOLD}{file_path}:{line}{Colors.RESET}")
         print(f"    {description}")
 
+def print_finding(severity, issue):
+    """Print a single finding as soon as it is known, while review is still streaming."""
+    color, icon = SEVERITY_STYLES.get(severity, (Colors.INFO, '⚪'))
+    file_path = issue.get('file', 'unknown')
+    line = issue.get('line', '?')
+    description = issue.get('issue', 'No description')
+    print(f"  {color}{icon}{Colors.RESET} {Colors.BOLD}{file_path}:{line}{Colors.RESET} {color}{severity.upper()}{Colors.RESET}")
+    print(f"    {description}")
+
 def display_review_results(results):
     """Display code review results in a clean, colored format."""
     print(f"\n{Colors.BOLD}{'=' * 70}{Colors.RESET}")
@@ -252,6 +558,119 @@ def get_diff_refs(project_id, mr_id, gitlab_token, api_url):
     except Exception:
         return None
 
+MR_DIFFS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'mr_diffs')
+MR_DIFFS_PAGE_SIZE = 50
+MR_DIFFS_CACHE_MAX_AGE = 14 * 24 * 3600
+DIFF_FIELDS = ('old_path', 'new_path', 'new_file', 'renamed_file', 'deleted_file', 'diff')
+
+def read_cached_diffs(from_sha, to_sha):
+    """Per-file diffs between two commits, cached earlier. Commits never change, so neither does their diff."""
+    try:
+        with open(os.path.join(MR_DIFFS_CACHE_DIR, f"{from_sha}_{to_sha}.json"), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_cached_diffs(from_sha, to_sha, diffs):
+    os.makedirs(MR_DIFFS_CACHE_DIR, exist_ok=True)
+    path = os.path.join(MR_DIFFS_CACHE_DIR, f"{from_sha}_{to_sha}.json")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump([{field: diff.get(field) for field in DIFF_FIELDS} for diff in diffs], f)
+    os.replace(tmp_path, path)
+
+    # Drop diffs of old commits, so cache doesn't grow forever
+    now = time.time()
+    for name in os.listdir(MR_DIFFS_CACHE_DIR):
+        entry = os.path.join(MR_DIFFS_CACHE_DIR, name)
+        try:
+            if now - os.path.getmtime(entry) > MR_DIFFS_CACHE_MAX_AGE:
+                os.remove(entry)
+        except OSError:
+            pass
+
+def get_merge_request_diffs(project_id, mr_id, gitlab_token, api_url, diff_refs=None):
+    """Per-file diffs of the merge request, page by page from the /diffs endpoint.
+
+    Falls back to /changes on GitLab older than 15.7. With diff_refs, diffs are cached by
+    base and head SHA. Returns None when diffs can't be fetched.
+    """
+    base_sha = (diff_refs or {}).get('base_sha')
+    head_sha = (diff_refs or {}).get('head_sha')
+    if base_sha and head_sha:
+        cached = read_cached_diffs(base_sha, head_sha)
+        if cached is not None:
+            return cached
+
+    url = f"{api_url}/projects/{project_id}/merge_requests/{mr_id}/diffs"
+    try:
+        diffs, status_code = _paginate(url, {"per_page": MR_DIFFS_PAGE_SIZE}, gitlab_token)
+        if status_code == 404 and not diffs:
+            mr_changes = get_merge_request_changes(project_id, mr_id, gitlab_token, api_url)
+            if not mr_changes:
+                return None
+            diffs = mr_changes.get('changes', [])
+        elif status_code != 200:
+            print(f"{Colors.CRITICAL}✗ Failed to get MR diffs: {status_code}{Colors.RESET}")
+            return None
+    except Exception as e:
+        print(f"{Colors.CRITICAL}✗ Error getting MR diffs: {e}{Colors.RESET}")
+        return None
+
+    if base_sha and head_sha:
+        write_cached_diffs(base_sha, head_sha, diffs)
+    return diffs
+
+def get_compare_diffs(project_id, from_sha, to_sha, gitlab_token, api_url):
+    """Per-file diffs of commits from_sha..to_sha from the repository compare API, cached by both SHAs."""
+    import requests
+
+    cached = read_cached_diffs(from_sha, to_sha)
+    if cached is not None:
+        return cached
+
+    url = f"{api_url}/projects/{project_id}/repository/compare"
+    headers = {"Private-Token": gitlab_token}
+    try:
+        response = requests.get(url, headers=headers, params={"from": from_sha, "to": to_sha, "straight": "true"})
+        if response.status_code != 200:
+            print(f"{Colors.CRITICAL}✗ Failed to compare {from_sha[:8]}..{to_sha[:8]}: {response.status_code}{Colors.RESET}")
+            return None
+        diffs = response.json().get('diffs', [])
+    except Exception as e:
+        print(f"{Colors.CRITICAL}✗ Error comparing commits: {e}{Colors.RESET}")
+        return None
+
+    write_cached_diffs(from_sha, to_sha, diffs)
+    return diffs
+
+def is_remote_ancestor(project_id, sha, head_sha, gitlab_token, api_url):
+    """Same as is_ancestor_of_head, asked from GitLab: sha is ancestor of head_sha if it is their merge base."""
+    import requests
+
+    url = f"{api_url}/projects/{project_id}/repository/merge_base"
+    headers = {"Private-Token": gitlab_token}
+    try:
+        response = requests.get(url, headers=headers, params=[("refs[]", sha), ("refs[]", head_sha)])
+        return response.status_code == 200 and response.json().get('id') == sha
+    except Exception:
+        return False
+
+def get_remote_diff(project_id, mr_id, gitlab_token, api_url, diff_refs, since_sha=None):
+    """Diff of the merge request from the GitLab API, or only since since_sha if given. No checkout needed."""
+    if since_sha:
+        diffs = get_compare_diffs(project_id, since_sha, diff_refs['head_sha'], gitlab_token, api_url)
+    else:
+        diffs = get_merge_request_diffs(project_id, mr_id, gitlab_token, api_url, diff_refs)
+    if diffs is None:
+        return None
+
+    diff_output = build_diff_from_changes(diffs)
+    if not diff_output.strip():
+        print(f"{Colors.INFO}ℹ No changes detected in merge request !{mr_id}{Colors.RESET}")
+        return None
+    return diff_output
+
 def post_inline_comment(issue, severity, project_id, mr_id, gitlab_token, api_url, diff_refs):
     """Post an inline comment on a specific line in the merge request."""
     import requests
@@ -304,6 +723,121 @@ def post_inline_comment(issue, severity, project_id, mr_id, gitlab_token, api_ur
         print(f"{Colors.DIM}  Error posting inline comment: {e}{Colors.RESET}")
         return False
 
+AI_NOTE_PATTERN = re.compile(r'^\S+ \*\*(CRITICAL|HIGH|MEDIUM|LOW)\*\*: (.*)$', re.DOTALL)
+AI_SUMMARY_LINE_PATTERN = re.compile(r'^- \S+ \*\*`(.+):(\d+)`\*\* - (.*)$', re.MULTILINE)
+
+def _paginate(url, params, gitlab_token):
+    """Collect items of all pages of a GitLab list endpoint, following X-Next-Page.
+
+    Returns (items, status_code): items fetched so far and status of the first response that
+    wasn't 200, or 200 when all pages were fetched.
+    """
+    import requests
+
+    headers = {"Private-Token": gitlab_token}
+    items = []
+    page = 1
+    while page:
+        response = requests.get(url, headers=headers, params={**params, "page": page})
+        if response.status_code != 200:
+            return items, response.status_code
+        items.extend(response.json())
+        page = int(response.headers.get('X-Next-Page') or 0)
+    return items, 200
+
+def get_merge_request_discussions(project_id, mr_id, gitlab_token, api_url):
+    """Get all discussions of the merge request, following pagination."""
+    url = f"{api_url}/projects/{project_id}/merge_requests/{mr_id}/discussions"
+    discussions, status_code = _paginate(url, {"per_page": 100}, gitlab_token)
+    if status_code != 200:
+        print(f"{Colors.HIGH}⚠ Could not get existing discussions: {status_code}{Colors.RESET}")
+    return discussions
+
+def normalize_issue_text(text):
+    """Lowercase issue text and strip punctuation and whitespace differences."""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+
+def finding_fingerprint(file_path, line, text):
+    return (file_path, str(line), normalize_issue_text(text))
+
+def build_fingerprint_index(discussions):
+    """Fingerprint AI findings already present on the MR, both inline and in summary comments."""
+    index = set()
+    for discussion in discussions:
+        for note in discussion.get('notes', []):
+            body = note.get('body') or ''
+            position = note.get('position') or {}
+            match = AI_NOTE_PATTERN.match(body)
+            if match and position.get('new_path'):
+                index.add(finding_fingerprint(position['new_path'], position.get('new_line'), match.group(2)))
+            for file_path, line, text in AI_SUMMARY_LINE_PATTERN.findall(body):
+                index.add(finding_fingerprint(file_path, line, text))
+    return index
+
+def filter_new_findings(results, index):
+    """Return copy of results without findings already in index. Returns (results, skipped_count)."""
+    filtered = dict(results)
+    skipped = 0
+    for severity in SEVERITIES:
+        new_issues = []
+        for issue in results.get(severity, []):
+            fingerprint = finding_fingerprint(issue.get('file'), issue.get('line'), issue.get('issue', ''))
+            if fingerprint in index:
+                skipped += 1
+            else:
+                index.add(fingerprint)
+                new_issues.append(issue)
+        filtered[severity] = new_issues
+    return filtered, skipped
+
+def get_added_lines(changes):
+    """Map file path to set of added line numbers from MR changes."""
+    added = {}
+    for change in changes:
+        lines = added.setdefault(change.get('new_path'), set())
+        new_line = 0
+        for diff_line in (change.get('diff') or '').splitlines():
+            hunk = re.match(r'^@@ -\d+(?:,\d+)? \+(\d+)', diff_line)
+            if hunk:
+                new_line = int(hunk.group(1))
+            elif diff_line.startswith('+'):
+                lines.add(new_line)
+                new_line += 1
+            elif not diff_line.startswith('-') and not diff_line.startswith('\\'):
+                new_line += 1
+    return added
+
+def resolve_stale_ai_discussions(discussions, project_id, mr_id, gitlab_token, api_url):
+    """Resolve unresolved AI threads whose line is no longer part of the MR changes."""
+    import requests
+
+    diffs = get_merge_request_diffs(project_id, mr_id, gitlab_token, api_url,
+                                    get_diff_refs(project_id, mr_id, gitlab_token, api_url))
+    if diffs is None:
+        return 0
+    added_lines = get_added_lines(diffs)
+
+    headers = {"Private-Token": gitlab_token}
+    resolved = 0
+    for discussion in discussions:
+        notes = discussion.get('notes', [])
+        if not notes or not notes[0].get('resolvable') or notes[0].get('resolved'):
+            continue
+        position = notes[0].get('position') or {}
+        if not AI_NOTE_PATTERN.match(notes[0].get('body') or '') or not position.get('new_path'):
+            continue
+        if position.get('new_line') in added_lines.get(position['new_path'], set()):
+            continue
+
+        url = f"{api_url}/projects/{project_id}/merge_requests/{mr_id}/discussions/{discussion['id']}"
+        try:
+            response = requests.put(url, headers=headers, params={"resolved": "true"})
+            if response.status_code == 200:
+                resolved += 1
+        except Exception as e:
+            print(f"{Colors.DIM}  Error resolving discussion: {e}{Colors.RESET}")
+    return resolved
+
 def post_to_merge_request(comment_body, project_id, mr_id, gitlab_token, api_url):
     """Post AI review as a general comment on the GitLab merge request."""
     import requests
@@ -325,7 +859,7 @@ def post_to_merge_request(comment_body, project_id, mr_id, gitlab_token, api_url
         print(f"{Colors.CRITICAL}✗ Error posting to GitLab: {e}{Colors.RESET}")
         return False
 
-def run_review():
+def run_review(stream=False):
     """Main entry point for AI code review (terminal output)."""
     print(f"{Colors.INFO}🔍 Analyzing code changes...{Colors.RESET}")
 
@@ -334,57 +868,321 @@ def run_review():
         sys.exit(0)
 
     print(f"{Colors.INFO}🤖 Running AI code review...{Colors.RESET}")
+    if stream:
+        run_streaming_review(diff_content)
+        return
+
     results = review_code(diff_content)
     if not results:
         print(f"{Colors.HIGH}⚠ AI review skipped{Colors.RESET}")
         sys.exit(0)
     display_review_results(results)
 
-def run_review_for_mr(project_id, mr_id, gitlab_token, api_url):
-    """Run AI code review and post inline comments to GitLab merge request."""
-    print(f"{Colors.INFO}🤖 Running AI code review...{Colors.RESET}")
-
-    diff_content = get_branch_diff()
-    if not diff_content:
-        return
+def run_streaming_review(diff_content):
+    """Print findings while the model is still generating, then the summary."""
+    print(f"\n{Colors.BOLD}{'=' * 70}{Colors.RESET}")
+    print(f"{Colors.BOLD}  AI CODE REVIEW{Colors.RESET}")
+    print(f"{Colors.BOLD}{'=' * 70}{Colors.RESET}\n")
 
-    results = review_code(diff_content)
+    results = review_code_streaming(diff_content, print_finding)
     if not results:
         print(f"{Colors.HIGH}⚠ AI review skipped{Colors.RESET}")
+        sys.exit(0)
+
+    total = sum(len(results.get(severity, [])) for severity in SEVERITIES)
+    if total == 0:
+        print(f"{Colors.INFO}{Colors.BOLD}✓ No issues found!{Colors.RESET}")
+        print(f"{Colors.DIM}  Code looks good to merge.{Colors.RESET}")
+    else:
+        print(f"\n{Colors.BOLD}Found {total} issue(s){Colors.RESET}")
+
+    summary = results.get('summary', '')
+    if summary:
+        print(f"\n{Colors.BOLD}Summary:{Colors.RESET}")
+        print(f"  {Colors.DIM}{summary}{Colors.RESET}")
+
+    print(f"\n{Colors.BOLD}{'=' * 70}{Colors.RESET}\n")
+
+def stream_review_to_merge_request(diff_content, index, project_id, mr_id, gitlab_token, api_url, diff_refs):
+    """Stream AI review and post each new finding inline as soon as it is complete.
+
+    Returns (results, total_posted, failed_comments, skipped), results is None when review failed.
+    """
+    pending = []
+    skipped = 0
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        def on_finding(severity, issue):
+            nonlocal skipped
+            fingerprint = finding_fingerprint(issue.get('file'), issue.get('line'), issue.get('issue', ''))
+            if fingerprint in index:
+                skipped += 1
+                return
+            index.add(fingerprint)
+            print_finding(severity, issue)
+            future = executor.submit(post_inline_comment, issue, severity, project_id, mr_id, gitlab_token, api_url, diff_refs)
+            pending.append((severity, issue, future))
+
+        results = review_code_streaming(diff_content, on_finding)
+
+    total_posted = 0
+    failed_comments = []
+    for severity, issue, future in pending:
+        if future.result():
+            total_posted += 1
+        else:
+            failed_comments.append((severity, issue))
+    return results, total_posted, failed_comments, skipped
+
+def run_review_for_mr(project_id, mr_id, gitlab_token, api_url, full=False, resolve_stale=False, stream=False, remote=False):
+    """Run AI code review and post inline comments to GitLab merge request.
+
+    Only commits pushed since the last reviewed head SHA are reviewed, unless full is set
+    or the branch history was rewritten since. Findings already present on the MR are not
+    posted again; with resolve_stale, earlier AI threads on lines no longer changed are resolved.
+    With stream, findings are posted while the model is still generating.
+    With remote, the diff comes from the GitLab API instead of the local checkout.
+    """
+    diff_refs = None
+    if remote:
+        diff_refs = get_diff_refs(project_id, mr_id, gitlab_token, api_url)
+        if not diff_refs or not diff_refs.get('head_sha'):
+            print(f"{Colors.CRITICAL}✗ Could not get merge request !{mr_id}{Colors.RESET}")
+            return
+        head_sha = diff_refs['head_sha']
+    else:
+        head_sha = get_head_sha()
+    last_sha = None if full else load_review_state().get(f"{project_id}:{mr_id}")
+
+    # Threads can go stale without anything new to review (e.g. a reviewed commit was reverted), so
+    # they are resolved before deciding whether to review
+    discussions = None
+    if resolve_stale:
+        discussions = get_merge_request_discussions(project_id, mr_id, gitlab_token, api_url)
+        resolved = resolve_stale_ai_discussions(discussions, project_id, mr_id, gitlab_token, api_url)
+        if resolved:
+            print(f"{Colors.INFO}✓ Resolved {resolved} outdated AI discussion(s){Colors.RESET}")
+
+    if last_sha and last_sha == head_sha:
+        print(f"{Colors.INFO}ℹ No new commits since last AI review ({head_sha[:8]}){Colors.RESET}")
         return
+    if last_sha and not (is_remote_ancestor(project_id, last_sha, head_sha, gitlab_token, api_url)
+                         if remote else is_ancestor_of_head(last_sha)):
+        print(f"{Colors.DIM}  Branch history changed since last AI review, reviewing all changes{Colors.RESET}")
+        last_sha = None
 
-    # Get diff refs for inline comments
-    diff_refs = get_diff_refs(project_id, mr_id, gitlab_token, api_url)
-    if not diff_refs or not all(diff_refs.values()):
-        print(f"{Colors.HIGH}⚠ Could not get diff refs, posting summary only{Colors.RESET}")
-        comment = format_gitlab_comment(results)
-        post_to_merge_request(comment, project_id, mr_id, gitlab_token, api_url)
+    if last_sha:
+        print(f"{Colors.INFO}🤖 Running AI code review of changes since {last_sha[:8]}...{Colors.RESET}")
+    else:
+        print(f"{Colors.INFO}🤖 Running AI code review...{Colors.RESET}")
+
+    if remote:
+        diff_content = get_remote_diff(project_id, mr_id, gitlab_token, api_url, diff_refs, since_sha=last_sha)
+    else:
+        diff_content = get_branch_diff(since_sha=last_sha)
+    if not diff_content:
         return
 
-    # Post inline comments for each issue
+    # Existing discussions are needed to skip findings that are already on the merge request
+    if discussions is None:
+        discussions = get_merge_request_discussions(project_id, mr_id, gitlab_token, api_url)
+    index = build_fingerprint_index(discussions)
+
+    # Get diff refs for inline comments
+    if not diff_refs:
+        diff_refs = get_diff_refs(project_id, mr_id, gitlab_token, api_url)
+    can_post_inline = diff_refs and all(diff_refs.values())
+
+    if stream and can_post_inline:
+        results, total_posted, failed_comments, skipped = stream_review_to_merge_request(
+            diff_content, index, project_id, mr_id, gitlab_token, api_url, diff_refs)
+        if not results:
+            print(f"{Colors.HIGH}⚠ AI review skipped{Colors.RESET}")
+            return
+    else:
+        results = review_code(diff_content)
+        if not results:
+            print(f"{Colors.HIGH}⚠ AI review skipped{Colors.RESET}")
+            return
+        results, skipped = filter_new_findings(results, index)
+
+    if skipped:
+        print(f"{Colors.DIM}  Skipped {skipped} finding(s) already posted on the merge request{Colors.RESET}")
+
+    # Head SHA is remembered only once findings are on the merge request, otherwise the next
+    # review would skip these commits and the findings would never be posted
+    if not (stream and can_post_inline):
+        if skipped and not any(results.get(s) for s in SEVERITIES):
+            print(f"{Colors.INFO}✓ No new issues to post{Colors.RESET}")
+            if head_sha:
+                save_reviewed_sha(project_id, mr_id, head_sha)
+            return
+
+        if not can_post_inline:
+            print(f"{Colors.HIGH}⚠ Could not get diff refs, posting summary only{Colors.RESET}")
+            comment = format_gitlab_comment(results)
+            if post_to_merge_request(comment, project_id, mr_id, gitlab_token, api_url) and head_sha:
+                save_reviewed_sha(project_id, mr_id, head_sha)
+            return
+
+        total_posted, failed_comments = post_inline_findings(results, project_id, mr_id, gitlab_token, api_url, diff_refs)
+
+    # Post summary comment only if there are failed inline comments
+    posted = True
+    if failed_comments:
+        posted = post_failed_comments_summary(failed_comments, project_id, mr_id, gitlab_token, api_url)
+    elif total_posted:
+        print(f"{Colors.INFO}✓ All {total_posted} issues posted as inline comments{Colors.RESET}")
+    elif skipped:
+        print(f"{Colors.INFO}✓ No new issues to post{Colors.RESET}")
+    else:
+        print(f"{Colors.INFO}{Colors.BOLD}✓ No issues found!{Colors.RESET}")
+
+    if posted and head_sha:
+        save_reviewed_sha(project_id, mr_id, head_sha)
+
+def post_inline_findings(results, project_id, mr_id, gitlab_token, api_url, diff_refs, verbose=True):
+    """Post each finding as inline comment. Returns (total_posted, failed_comments)."""
     total_posted = 0
     failed_comments = []
 
-    for severity in ['critical', 'high', 'medium', 'low']:
+    for severity in SEVERITIES:
         issues = results.get(severity, [])
         for issue in issues:
             success = post_inline_comment(issue, severity, project_id, mr_id, gitlab_token, api_url, diff_refs)
             if success:
                 total_posted += 1
-                print(f"{Colors.INFO}  ✓ Posted {severity} issue on {issue['file']}:{issue['line']}{Colors.RESET}")
+                if verbose:
+                    print(f"{Colors.INFO}  ✓ Posted {severity} issue on {issue['file']}:{issue['line']}{Colors.RESET}")
             else:
                 failed_comments.append((severity, issue))
+    return total_posted, failed_comments
 
-    # Post summary comment only if there are failed inline comments
-    if failed_comments:
-        summary_comment = f"## 🤖 AI Code Review\n\n"
-        summary_comment += f"### Issues (could not post inline):\n"
-        for severity, issue in failed_comments:
-            emoji = {'critical': '🔴', 'high': '🟡', 'medium': '🔵', 'low': '🟢'}.get(severity, '⚪')
-            summary_comment += f"- {emoji} **`{issue['file']}:{issue['line']}`** - {issue['issue']}\n"
-        post_to_merge_request(summary_comment, project_id, mr_id, gitlab_token, api_url)
-    else:
-        print(f"{Colors.INFO}✓ All {total_posted} issues posted as inline comments{Colors.RESET}")
+def post_failed_comments_summary(failed_comments, project_id, mr_id, gitlab_token, api_url):
+    summary_comment = f"## 🤖 AI Code Review\n\n"
+    summary_comment += f"### Issues (could not post inline):\n"
+    for severity, issue in failed_comments:
+        emoji = {'critical': '🔴', 'high': '🟡', 'medium': '🔵', 'low': '🟢'}.get(severity, '⚪')
+        summary_comment += f"- {emoji} **`{issue['file']}:{issue['line']}`** - {issue['issue']}\n"
+    return post_to_merge_request(summary_comment, project_id, mr_id, gitlab_token, api_url)
+
+AI_REVIEW_WORKERS = 3
+
+def list_open_merge_requests(project_id, gitlab_token, api_url, reviewer_ids=None):
+    """Open merge requests of project, following pagination. With reviewer_ids, only MRs where
+    one of them is a reviewer."""
+    url = f"{api_url}/projects/{project_id}/merge_requests"
+    merge_requests, status_code = _paginate(url, {"state": "opened", "per_page": 100}, gitlab_token)
+    if status_code != 200:
+        print(f"{Colors.CRITICAL}✗ Failed to list merge requests: {status_code}{Colors.RESET}")
+        return None
+
+    if reviewer_ids:
+        reviewer_ids = set(reviewer_ids)
+        merge_requests = [mr for mr in merge_requests
+                          if reviewer_ids & {reviewer['id'] for reviewer in mr.get('reviewers') or []}]
+    return merge_requests
+
+def review_remote_merge_request(project_id, mr, gitlab_token, api_url):
+    """Review one MR end to end from the GitLab API (no local checkout): fetch diff, review, post.
+
+    Returns outcome dict with 'status' ('reviewed', 'empty' or 'failed'), 'posted' (inline
+    discussions), 'summarized' (findings in a summary note instead), 'skipped' and 'error'.
+    """
+    mr_id = mr['iid']
+    outcome = {'mr': mr, 'status': 'failed', 'posted': 0, 'summarized': 0, 'skipped': 0, 'error': None}
+
+    diff_refs = get_diff_refs(project_id, mr_id, gitlab_token, api_url) or {}
+    diffs = get_merge_request_diffs(project_id, mr_id, gitlab_token, api_url, diff_refs)
+    if diffs is None:
+        outcome['error'] = 'could not get changes'
+        return outcome
+    head_sha = diff_refs.get('head_sha') or mr.get('sha')
+
+    diff_content = build_diff_from_changes(diffs)
+    if not diff_content.strip():
+        outcome['status'] = 'empty'
+        if head_sha:
+            save_reviewed_sha(project_id, mr_id, head_sha)
+        return outcome
+
+    results = review_code(diff_content)
+    if not results:
+        outcome['error'] = 'AI review failed'
+        return outcome
+
+    discussions = get_merge_request_discussions(project_id, mr_id, gitlab_token, api_url)
+    results, outcome['skipped'] = filter_new_findings(results, build_fingerprint_index(discussions))
+
+    if any(results.get(severity) for severity in SEVERITIES):
+        if all(diff_refs.get(key) for key in ('base_sha', 'head_sha', 'start_sha')):
+            outcome['posted'], failed_comments = post_inline_findings(
+                results, project_id, mr_id, gitlab_token, api_url, diff_refs, verbose=False)
+            if failed_comments:
+                if not post_failed_comments_summary(failed_comments, project_id, mr_id, gitlab_token, api_url):
+                    outcome['error'] = 'could not post findings'
+                    return outcome
+                outcome['summarized'] = len(failed_comments)
+        else:
+            if not post_to_merge_request(format_gitlab_comment(results), project_id, mr_id, gitlab_token, api_url):
+                outcome['error'] = 'could not post findings'
+                return outcome
+            outcome['summarized'] = sum(len(results.get(severity, [])) for severity in SEVERITIES)
+
+    # Saved only after findings are posted, so a failed post is retried by the next run
+    if head_sha:
+        save_reviewed_sha(project_id, mr_id, head_sha)
+    outcome['status'] = 'reviewed'
+    return outcome
+
+def run_review_for_all_mrs(project_id, gitlab_token, api_url, reviewer_ids=None, workers=AI_REVIEW_WORKERS):
+    """AI review every open MR of project whose head changed since its last AI review.
+
+    Up to workers MRs are reviewed at once. Returns False if any review failed.
+    """
+    print(f"{Colors.INFO}🔍 Listing open merge requests...{Colors.RESET}")
+    merge_requests = list_open_merge_requests(project_id, gitlab_token, api_url, reviewer_ids)
+    if merge_requests is None:
+        return False
+
+    state = load_review_state()
+    pending = [mr for mr in merge_requests if state.get(f"{project_id}:{mr['iid']}") != mr.get('sha')]
+    up_to_date = len(merge_requests) - len(pending)
+    if not pending:
+        print(f"{Colors.INFO}✓ All {len(merge_requests)} open merge request(s) already reviewed at their current head{Colors.RESET}")
+        return True
+
+    print(f"{Colors.INFO}🤖 Reviewing {len(pending)} merge request(s), {up_to_date} already up to date...{Colors.RESET}")
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(review_remote_merge_request, project_id, mr, gitlab_token, api_url): mr
+                   for mr in pending}
+        for done, future in enumerate(as_completed(futures), start=1):
+            mr = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = {'mr': mr, 'status': 'failed', 'posted': 0, 'summarized': 0, 'skipped': 0, 'error': str(e)}
+            outcomes.append(outcome)
+
+            progress = f"[{done}/{len(pending)}] !{mr['iid']} {mr['title'][:50]}"
+            if outcome['status'] == 'failed':
+                print(f"{Colors.CRITICAL}  ✗ {progress}: {outcome['error']}{Colors.RESET}")
+            elif outcome['status'] == 'empty':
+                print(f"{Colors.DIM}  - {progress}: no changes{Colors.RESET}")
+            else:
+                summarized = f", {outcome['summarized']} in summary note" if outcome['summarized'] else ''
+                skipped = f", {outcome['skipped']} already posted" if outcome['skipped'] else ''
+                print(f"{Colors.INFO}  ✓ {progress}: {outcome['posted']} new inline finding(s){summarized}{skipped}{Colors.RESET}")
+
+    failed = [outcome for outcome in outcomes if outcome['status'] == 'failed']
+    print(f"\n{Colors.BOLD}AI review summary{Colors.RESET}")
+    print(f"  Reviewed:   {len(outcomes) - len(failed)}")
+    print(f"  Up to date: {up_to_date}")
+    print(f"  Failed:     {len(failed)}")
+    print(f"  Findings:   {sum(outcome['posted'] for outcome in outcomes)} posted inline, "
+          f"{sum(outcome['summarized'] for outcome in outcomes)} in summary notes")
+    return not failed
 
 if __name__ == '__main__':
     run_review()
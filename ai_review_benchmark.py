@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Replay stored diffs through ai_code_review.review_code and measure latency, tokens and findings.
+
+Usage:
+    python3 ai_review_benchmark.py --record name        # store current branch diff in corpus
+    python3 ai_review_benchmark.py                      # replay corpus against OpenAI
+    python3 ai_review_benchmark.py --backend local      # replay against local stand-in (no network)
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from ai_code_review import Colors, REVIEW_MODEL, SEVERITIES, get_branch_diff, get_openai_client, review_code
+
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(BASE_PATH, '.cache', 'benchmark_corpus')
+DEFAULT_OUTPUT = os.path.join(BASE_PATH, '.cache', 'benchmark_results.json')
+
+class LocalReviewBackend:
+    """Stand-in for the OpenAI client: answers like the model would, without network.
+
+    Latency is simulated as a fixed part plus a part per prompt token, token counts are
+    estimated as 4 characters per token. Lines adding TODO/FIXME become findings.
+    """
+
+    def __init__(self, base_latency=0.2, latency_per_1k_tokens=0.05):
+        self.base_latency = base_latency
+        self.latency_per_1k_tokens = latency_per_1k_tokens
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        prompt = ''.join(message['content'] for message in messages)
+        prompt_tokens = len(prompt) // 4
+        time.sleep(self.base_latency + prompt_tokens / 1000 * self.latency_per_1k_tokens)
+
+        findings = []
+        file_path = None
+        line_number = 0
+        for line in messages[-1]['content'].splitlines():
+            if line.startswith('+++ b/'):
+                file_path = line[len('+++ b/'):]
+            elif line.startswith('@@'):
+                match = re.match(r'^@@ -\d+(?:,\d+)? \+(\d+)', line)
+                line_number = int(match.group(1)) if match else 0
+            elif line.startswith('+'):
+                if re.search(r'TODO|FIXME', line):
+                    findings.append({"file": file_path, "line": line_number, "issue": "Unresolved TODO left in code"})
+                line_number += 1
+            elif not line.startswith('-'):
+                line_number += 1
+
+        content = json.dumps({"critical": [], "high": [], "medium": [], "low": findings,
+                              "summary": "Local stand-in review."})
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(content) // 4)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+def load_corpus(corpus_path):
+    """Return list of (name, diff) of .diff and .patch files in corpus directory."""
+    if not os.path.isdir(corpus_path):
+        return []
+    corpus = []
+    for name in sorted(os.listdir(corpus_path)):
+        if name.endswith(('.diff', '.patch')):
+            with open(os.path.join(corpus_path, name), 'r', errors='replace') as f:
+                corpus.append((name, f.read()))
+    return corpus
+
+def record_diff(corpus_path, name):
+    diff_content = get_branch_diff()
+    if not diff_content:
+        return False
+    os.makedirs(corpus_path, exist_ok=True)
+    path = os.path.join(corpus_path, f"{name}.diff")
+    with open(path, 'w') as f:
+        f.write(diff_content)
+    print(f"{Colors.INFO}✓ Stored diff in {path}{Colors.RESET}")
+    return True
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def run_one(client, model, name, diff_content):
+    stats = {}
+    started = time.perf_counter()
+    results = review_code(diff_content, client=client, model=model, stats=stats)
+    latency = time.perf_counter() - started
+    return {
+        'name': name,
+        'diff_bytes': len(diff_content),
+        'latency': latency,
+        'prompt_tokens': stats.get('prompt_tokens'),
+        'completion_tokens': stats.get('completion_tokens'),
+        'findings': sum(len(results.get(severity, [])) for severity in SEVERITIES) if results else None,
+        'parse_error': stats.get('parse_error', False),
+        'error': stats.get('error'),
+    }
+
+def run_benchmark(client, model, corpus, repeat=1, concurrency=1):
+    jobs = [(name, diff) for _ in range(repeat) for name, diff in corpus]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        runs = list(executor.map(lambda job: run_one(client, model, *job), jobs))
+    wall_time = time.perf_counter() - started
+
+    latencies = [run['latency'] for run in runs if not run['error']]
+    completion_tokens = sum(run['completion_tokens'] or 0 for run in runs)
+    summary = {
+        'requests': len(runs),
+        'errors': sum(1 for run in runs if run['error']),
+        'parse_errors': sum(1 for run in runs if run['parse_error']),
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'prompt_tokens': sum(run['prompt_tokens'] or 0 for run in runs),
+        'completion_tokens': completion_tokens,
+        'findings': sum(run['findings'] or 0 for run in runs),
+        'wall_time': wall_time,
+        'requests_per_second': len(runs) / wall_time if wall_time else None,
+        'completion_tokens_per_second': completion_tokens / wall_time if wall_time else None,
+    }
+    return summary, runs
+
+def print_summary(summary):
+    def fmt(value, unit=''):
+        return 'n/a' if value is None else f"{value:.2f}{unit}" if isinstance(value, float) else f"{value}{unit}"
+
+    print(f"\n{Colors.BOLD}AI review benchmark{Colors.RESET}")
+    print(f"  Requests:        {summary['requests']} ({summary['errors']} errors, {summary['parse_errors']} JSON parse failures)")
+    print(f"  Latency p50/p95: {fmt(summary['latency_p50'], 's')} / {fmt(summary['latency_p95'], 's')}")
+    print(f"  Tokens:          {summary['prompt_tokens']} prompt, {summary['completion_tokens']} completion")
+    print(f"  Findings:        {summary['findings']}")
+    print(f"  Throughput:      {fmt(summary['requests_per_second'], ' req/s')}, {fmt(summary['completion_tokens_per_second'], ' completion tokens/s')}")
+
+def main():
+    parser = argparse.ArgumentParser("Replay stored diffs through AI code review and measure performance")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory with .diff/.patch files to replay")
+    parser.add_argument("--record", metavar="NAME", help="Store diff of current branch in corpus as NAME.diff and exit")
+    parser.add_argument("--backend", choices=["openai", "local"], default="openai", help="Review backend to benchmark")
+    parser.add_argument("--model", default=REVIEW_MODEL, help="Model name passed to backend")
+    parser.add_argument("--repeat", type=int, default=1, help="How many times to replay each diff")
+    parser.add_argument("--concurrency", type=int, default=1, help="How many reviews to run at once")
+    parser.add_argument("--local_latency", type=float, default=0.2, help="Base latency of local backend in seconds")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="File to write JSON results to")
+    args = parser.parse_args()
+
+    if args.record:
+        sys.exit(0 if record_diff(args.corpus, args.record) else 1)
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"{Colors.HIGH}⚠ No diffs in {args.corpus}, add some with --record NAME{Colors.RESET}")
+        sys.exit(1)
+
+    client = LocalReviewBackend(args.local_latency) if args.backend == 'local' else get_openai_client()
+    if not client:
+        sys.exit(1)
+
+    print(f"{Colors.INFO}🏁 Replaying {len(corpus)} diff(s) x{args.repeat} against {args.backend} ({args.model})...{Colors.RESET}")
+    summary, runs = run_benchmark(client, args.model, corpus, args.repeat, args.concurrency)
+    print_summary(summary)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'backend': args.backend,
+            'model': args.model,
+            'concurrency': args.concurrency,
+            'summary': summary,
+            'runs': runs,
+        }, f, indent=2)
+    print(f"\n{Colors.DIM}Results written to {args.output}{Colors.RESET}")
+
+if __name__ == '__main__':
+    main()
@@ -7,9 +7,18 @@ import inquirer
 import datetime
 import re
 import os
+import random
 import requests
+import sqlite3
 import sys
+import time
+import threading
+import uuid
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from urllib.parse import quote
+
+import git_metadata
 
 # Setup config parser and read settings
 config = configparser.ConfigParser()
@@ -36,12 +45,44 @@ with open(os.path.join(absolute_config_path,'configs/templates.json'), 'r') as f
 TEMPLATES = jsonConfig['templates']
 REVIEWERS = jsonConfig['reviewers']
 PRODUCTION_MAPPINGS = jsonConfig.get('productionMappings', {})
+RELEASE_NOTES_LABELS = jsonConfig.get('releaseNotesLabels', [])
+
+# Local cache for data that rarely changes (reviewer profiles, ...)
+CACHE_DIR = os.path.join(absolute_config_path, '.cache')
+REVIEWER_PROFILES_TTL = 7 * 24 * 3600
+REVIEWER_PROFILE_RETRY_AFTER = 3600
+
+def read_cache(name, max_age=None):
+    """Return cached data stored under name, or None if missing or older than max_age seconds."""
+    path = os.path.join(CACHE_DIR, name + '.json')
+    try:
+        if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_cache(name, data):
+    """Store data under name, replacing the previous file atomically."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, name + '.json')
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
 
 def get_project_id():
     project_link = getProjectLinkFromCurrentDir()
     if (project_link == -1):
         return enterProjectId()
 
+    # Project id of this repository is remembered in its git config
+    if getGitConfig('githappens.projecturl') == project_link:
+        cached_id = getGitConfig('githappens.projectid')
+        if cached_id:
+            return int(cached_id)
+
     allProjects = get_all_projects(project_link)
     # Find projects id by project ssh link gathered from repo
     matching_id = None
@@ -49,8 +90,274 @@ def get_project_id():
         if project.get("ssh_url_to_repo") == project_link:
             matching_id = project.get("id")
             break
+
+    if matching_id:
+        setGitConfig('githappens.projecturl', project_link)
+        setGitConfig('githappens.projectid', matching_id)
     return matching_id
 
+def getGitConfig(key):
+    # Read config files directly when possible, spawning git only when they include other files
+    if git_metadata.read_config() is not None:
+        return git_metadata.config_value(key)
+    try:
+        result = subprocess.run(['git', 'config', '--get', key], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        if result.returncode == 0:
+            return result.stdout.decode('utf-8').strip()
+    except FileNotFoundError:
+        pass
+    return None
+
+def setGitConfig(key, value):
+    try:
+        subprocess.run(['git', 'config', key, str(value)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        pass
+
+WRITE_QUEUE_DB = os.path.join(CACHE_DIR, 'write_queue.sqlite')
+WRITE_QUEUE_MAX_ATTEMPTS = 8
+WRITE_QUEUE_BATCH_SIZE = 10
+WRITE_QUEUE_LEASE = 120
+WRITE_MARKER = '<!-- githappens:{} -->'
+
+def open_write_queue():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    db = sqlite3.connect(WRITE_QUEUE_DB, timeout=30)
+    db.execute("""CREATE TABLE IF NOT EXISTS writes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        method TEXT NOT NULL,
+        path TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        description TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        superseded INTEGER NOT NULL DEFAULT 0,
+        reported INTEGER NOT NULL DEFAULT 0)""")
+    # Journals created by older versions lack the newer columns
+    columns = {row[1] for row in db.execute("PRAGMA table_info(writes)")}
+    for column in ('superseded', 'reported'):
+        if column not in columns:
+            db.execute(f"ALTER TABLE writes ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+    return db
+
+def enqueue_write(method, path, payload, description, key=None):
+    """Journal a GitLab write and let background worker send it.
+
+    Writes with the same key are never in the queue twice: a pending write is replaced by the
+    newer payload, a key that was already sent or failed is queued again. A write that is being
+    sent right now gets the newer payload too and is marked superseded, so the worker sends it
+    once more after the current attempt.
+    """
+    key = key or f"{method}:{path}:{uuid.uuid4()}"
+    db = open_write_queue()
+    with db:
+        db.execute(
+            """INSERT INTO writes (idempotency_key, method, path, payload, description, created_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(idempotency_key) DO UPDATE SET
+                   payload = excluded.payload, description = excluded.description, last_error = NULL, reported = 0,
+                   superseded = (status = 'sending'),
+                   status = CASE WHEN status = 'sending' THEN 'sending' ELSE 'pending' END,
+                   attempts = CASE WHEN status = 'sending' THEN attempts ELSE 0 END,
+                   next_attempt_at = CASE WHEN status = 'sending' THEN next_attempt_at ELSE 0 END""",
+            (key, method, path, json.dumps(payload), description, time.time())
+        )
+    db.close()
+    start_write_queue_worker()
+
+write_queue_worker_started = False
+
+def start_write_queue_worker():
+    """Flush the queue in a detached process, so the command can return right away."""
+    global write_queue_worker_started
+    if write_queue_worker_started:
+        return
+    write_queue_worker_started = True
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), 'queue', 'flush', '--background'],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError as e:
+        print(f"Could not start background sync, run 'gh queue flush': {str(e)}")
+
+def claim_writes(db):
+    """Lease a batch of due writes to this worker, so concurrent workers don't send them twice."""
+    now = time.time()
+    with db:
+        # Take the write lock before selecting, otherwise two workers can select the same rows
+        db.execute("BEGIN IMMEDIATE")
+        rows = db.execute(
+            """SELECT id, idempotency_key, method, path, payload, description, attempts, status FROM writes
+               WHERE (status = 'pending' AND next_attempt_at <= ?) OR (status = 'sending' AND next_attempt_at <= ?)
+               ORDER BY id LIMIT ?""",
+            (now, now, WRITE_QUEUE_BATCH_SIZE)
+        ).fetchall()
+        db.executemany(
+            "UPDATE writes SET status = 'sending', superseded = 0, next_attempt_at = ? WHERE id = ?",
+            [(now + WRITE_QUEUE_LEASE, row[0]) for row in rows]
+        )
+    return rows
+
+def write_already_applied(session, path, marker):
+    """Look for marker in the newest notes at path, to tell whether an earlier attempt got through."""
+    response = session.get(f"{API_URL}{path}", params={'sort': 'desc', 'order_by': 'created_at', 'per_page': 100}, timeout=30)
+    response.raise_for_status()
+    return any(marker in (note.get('body') or '') for note in response.json())
+
+def send_write(session, row):
+    """Send one journaled write. Returns (status, error), status is 'done', 'failed', 'retry' or 'unknown'.
+
+    PUT is safe to repeat, POST is not: GitLab may have applied it although no response came back.
+    A POST carrying its key as marker is resent only after the notes show it did not get through,
+    a POST without marker is left 'unknown' for the user to resolve instead of being resent.
+    """
+    _, key, method, path, payload, _, attempts, status = row
+    marker = WRITE_MARKER.format(key)
+    has_marker = marker in payload
+    if method == 'POST' and (attempts or status == 'sending'):
+        if not has_marker and status == 'sending':
+            return 'unknown', 'sending was interrupted'
+        if has_marker:
+            try:
+                if write_already_applied(session, path, marker):
+                    return 'done', None
+            except requests.RequestException as e:
+                return 'retry', str(e)
+
+    ambiguous_status = 'unknown' if method == 'POST' and not has_marker else 'retry'
+    try:
+        response = session.request(method, f"{API_URL}{path}", json=json.loads(payload), timeout=30)
+    except requests.ConnectTimeout as e:
+        # Connection was never made, so nothing was applied
+        return 'retry', str(e)
+    except requests.RequestException as e:
+        return ambiguous_status, str(e)
+    if response.status_code < 300:
+        return 'done', None
+    error = f"{response.status_code} - {response.text[:200]}"
+    if response.status_code == 429:
+        return 'retry', error
+    # Other client errors won't get better by retrying, server errors and timeouts may or may not have been applied
+    if response.status_code >= 500 or response.status_code == 408:
+        return ambiguous_status, error
+    return 'failed', error
+
+def flush_write_queue(background=False):
+    """Send journaled writes in batches, retrying failures with exponential backoff.
+
+    In background mode nothing is printed and retries due within 5 minutes are waited for.
+    """
+    db = open_write_queue()
+    session = requests.Session()
+    session.headers.update({"Private-Token": GITLAB_TOKEN})
+    sent = 0
+
+    with ThreadPoolExecutor(max_workers=WRITE_QUEUE_BATCH_SIZE) as executor:
+        while True:
+            rows = claim_writes(db)
+            if not rows:
+                next_retry = db.execute("SELECT MIN(next_attempt_at) FROM writes WHERE status IN ('pending', 'sending')").fetchone()[0]
+                if background and next_retry is not None and next_retry - time.time() <= 300:
+                    time.sleep(max(1, next_retry - time.time()))
+                    continue
+                break
+
+            for row, (status, error) in zip(rows, executor.map(lambda r: send_write(session, r), rows)):
+                write_id, _, _, _, _, description, attempts, _ = row
+                attempts += 1
+                with db:
+                    # Newer payload arrived while this one was being sent, send that one too
+                    resend = db.execute(
+                        "UPDATE writes SET status = 'pending', superseded = 0, attempts = 0, next_attempt_at = 0 WHERE id = ? AND superseded = 1",
+                        (write_id,)
+                    ).rowcount
+                    if status == 'done':
+                        sent += 1
+                    if resend:
+                        continue
+                    if status == 'done':
+                        db.execute("UPDATE writes SET status = 'done', attempts = ?, last_error = NULL WHERE id = ?", (attempts, write_id))
+                    elif status == 'unknown':
+                        db.execute("UPDATE writes SET status = 'unknown', attempts = ?, last_error = ? WHERE id = ?", (attempts, error, write_id))
+                    elif status == 'failed' or attempts >= WRITE_QUEUE_MAX_ATTEMPTS:
+                        db.execute("UPDATE writes SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?", (attempts, error, write_id))
+                    else:
+                        db.execute(
+                            "UPDATE writes SET status = 'pending', attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                            (attempts, error, time.time() + 5 * 2 ** attempts, write_id)
+                        )
+                if not background:
+                    icon = {'done': '✅', 'unknown': '❓'}.get(status, '❌')
+                    print(f"{icon} {description}" + (f" ({error})" if error else ""))
+
+    # Keep journal small, sent writes are not needed after a week
+    with db:
+        db.execute("DELETE FROM writes WHERE status = 'done' AND created_at < ?", (time.time() - 7 * 24 * 3600,))
+    db.close()
+    return sent
+
+WRITE_QUEUE_STUCK_AFTER = 3600
+
+def check_write_queue():
+    """Report writes that failed or may not have been applied since the last run, and get writes that are due sent again.
+
+    The background worker stops when the next retry is far away, so every command checks
+    whether something is waiting. Output goes to stderr to keep --json output clean.
+    """
+    if not os.path.exists(WRITE_QUEUE_DB):
+        return
+    db = open_write_queue()
+    now = time.time()
+    with db:
+        failed = db.execute("SELECT id, description, last_error, status FROM writes WHERE status IN ('failed', 'unknown') AND reported = 0").fetchall()
+        db.executemany("UPDATE writes SET reported = 1 WHERE id = ?", [(row[0],) for row in failed])
+    due = db.execute("SELECT COUNT(*) FROM writes WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?", (now,)).fetchone()[0]
+    stuck = db.execute("SELECT COUNT(*) FROM writes WHERE status IN ('pending', 'sending') AND created_at <= ?",
+                       (now - WRITE_QUEUE_STUCK_AFTER,)).fetchone()[0]
+    db.close()
+
+    for _, description, error, status in failed:
+        if status == 'unknown':
+            print(f"❓ Queued write may or may not have reached GitLab: {description}" + (f" ({error})" if error else "")
+                  + ". Check it, then run 'gh queue retry' or 'gh queue drop'.", file=sys.stderr)
+        else:
+            print(f"❌ Queued write failed: {description}" + (f" ({error})" if error else ""), file=sys.stderr)
+    if stuck:
+        print(f"⚠️ {stuck} queued write(s) not sent for over an hour, see 'gh queue'.", file=sys.stderr)
+    if due:
+        start_write_queue_worker()
+
+def show_write_queue():
+    db = open_write_queue()
+    counts = dict(db.execute("SELECT status, COUNT(*) FROM writes GROUP BY status").fetchall())
+    print(f"Pending: {counts.get('pending', 0) + counts.get('sending', 0)}, failed: {counts.get('failed', 0)}, "
+          f"unknown: {counts.get('unknown', 0)}, sent: {counts.get('done', 0)}")
+    for description, status, attempts, error in db.execute(
+        "SELECT description, status, attempts, last_error FROM writes WHERE status != 'done' ORDER BY id"
+    ):
+        print(f"   [{status}] {description} (attempts: {attempts}){': ' + error if error else ''}")
+    db.close()
+
+def resolve_write_queue(retry):
+    """Queue failed and unknown writes again, or drop them from the journal."""
+    db = open_write_queue()
+    with db:
+        if retry:
+            count = db.execute("""UPDATE writes SET status = 'pending', attempts = 0, next_attempt_at = 0, last_error = NULL
+                                  WHERE status IN ('failed', 'unknown')""").rowcount
+        else:
+            count = db.execute("DELETE FROM writes WHERE status IN ('failed', 'unknown')").rowcount
+    db.close()
+    if retry and count:
+        start_write_queue_worker()
+    print(f"{'Queued again' if retry else 'Dropped'} {count} write(s).")
+
 def get_all_projects(project_link):
     url = API_URL + "/projects?membership=true&search=" + project_link.split('/')[-1].split('.')[0]
 
@@ -71,6 +378,9 @@ def get_all_projects(project_link):
         return None
 
 def getProjectLinkFromCurrentDir():
+    remote_url = git_metadata.remote_url()
+    if remote_url:
+        return remote_url
     try:
         cmd = 'git remote get-url origin'
         result = subprocess.run(cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
@@ -89,23 +399,76 @@ def enterProjectId():
             return project_id
         exit('Invalid project ID.')
 
+CURRENT_MILESTONE_QUERY = """
+query($fullPath: ID!, $date: Time) {
+  group(fullPath: $fullPath) {
+    milestones(state: active, containingDate: $date, sort: DUE_DATE_ASC, first: 20) {
+      nodes { id iid title startDate dueDate webPath }
+    }
+  }
+}
+"""
+
 def list_milestones(current=False):
+    if current:
+        return getCurrentMilestone()
     cmd = f'glab api /groups/{GROUP_ID}/milestones?state=active'
     result = subprocess.run(cmd.split(), stdout=subprocess.PIPE)
     milestones = json.loads(result.stdout)
-    if current:
-        today = datetime.date.today().strftime('%Y-%m-%d')
-        active_milestones = []
-        for milestone in milestones:
-            start_date = milestone['start_date']
-            due_date = milestone['due_date']
-            if start_date and due_date and start_date <= today and due_date >= today:
-                active_milestones.append(milestone)
-        active_milestones.sort(key=lambda x: x['due_date'])
-        return active_milestones[0]
+    write_completion_words('milestones', [(m['id'], m['title']) for m in milestones])
     return milestones
 
+def getCurrentMilestone():
+    """Active milestone covering today with the nearest due date, or None if there is none.
+
+    GitLab filters by date itself and returns only milestones covering today. It also counts
+    milestones with just one of the dates as covering, those are skipped here. When that query
+    fails (old GitLab, GraphQL disabled, ...), all active milestones are fetched and scanned here.
+    """
+    refreshMilestoneCompletion()
+    today = datetime.date.today().strftime('%Y-%m-%d')
+    try:
+        data = graphql_query(CURRENT_MILESTONE_QUERY, {"fullPath": get_group_full_path(), "date": today})
+        nodes = data['group']['milestones']['nodes']
+        milestone = next((m for m in nodes if m['startDate'] and m['dueDate']), None)
+        if milestone:
+            return {
+                'id': int(milestone['id'].rsplit('/', 1)[-1]),
+                'iid': milestone['iid'],
+                'title': milestone['title'],
+                'start_date': milestone['startDate'],
+                'due_date': milestone['dueDate'],
+            }
+        # A full page of half-dated milestones may hide a dated one, scan all of them then
+        if len(nodes) < 20:
+            return None
+    except Exception:
+        pass
+
+    active_milestones = [m for m in list_milestones()
+                         if m['start_date'] and m['due_date'] and m['start_date'] <= today <= m['due_date']]
+    active_milestones.sort(key=lambda x: x['due_date'])
+    return active_milestones[0] if active_milestones else None
+
+MILESTONE_COMPLETION_TTL = 24 * 3600
+
+def refreshMilestoneCompletion():
+    """Refresh milestone titles for shell completion in the background once a day,
+    the current milestone lookup itself doesn't list them."""
+    try:
+        if time.time() - os.path.getmtime(os.path.join(COMPLETION_DIR, 'milestones')) < MILESTONE_COMPLETION_TTL:
+            return
+    except OSError:
+        pass
+    def refresh():
+        try:
+            list_milestones()
+        except Exception:
+            pass
+    threading.Thread(target=refresh, daemon=True).start()
+
 def select_template():
+    write_completion_words('templates', [(t['name'], t['name']) for t in TEMPLATES])
     template_names = [t['name'] for t in TEMPLATES]
     template_names.append(CUSTOM_TEMPLATE)
     questions = [
@@ -219,16 +582,41 @@ def list_iterations():
     return iterations
 
 def getActiveIteration():
-    iterations = list_iterations()
+    """Iteration covering today, or None if there is none.
+
+    GitLab is asked for the current iteration only. On GitLab versions that don't know
+    state=current, open iterations are fetched and scanned here.
+    """
+    cmd = f'glab api /groups/{GROUP_ID}/iterations?state=current&per_page=1'
+    try:
+        result = subprocess.run(cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        iterations = json.loads(result.stdout)
+        return iterations[0] if iterations else None
+    except (subprocess.CalledProcessError, ValueError):
+        pass
+
     today = datetime.date.today().strftime('%Y-%m-%d')
     active_iterations = []
-    for iteration in iterations:
+    for iteration in list_iterations():
         start_date = iteration['start_date']
         due_date = iteration['due_date']
         if start_date and due_date and start_date <= today and due_date >= today:
             active_iterations.append(iteration)
     active_iterations.sort(key=lambda x: x['due_date'])
-    return active_iterations[0]
+    return active_iterations[0] if active_iterations else None
+
+def getCachedActiveIteration():
+    """Active iteration from cache while it still covers today, otherwise from GitLab. None if there is none."""
+    today = datetime.date.today().strftime('%Y-%m-%d')
+    iteration = read_cache(f'active_iteration_{GROUP_ID}')
+    if iteration and iteration['start_date'] <= today <= iteration['due_date']:
+        return iteration
+
+    iteration = getActiveIteration()
+    if not iteration:
+        return None
+    write_cache(f'active_iteration_{GROUP_ID}', iteration)
+    return iteration
 
 def getAuthorizedUser():
     output = subprocess.check_output(["glab", "api", "/user"])
@@ -237,7 +625,18 @@ def getAuthorizedUser():
 def list_epics():
     cmd = f'glab api /groups/{GROUP_ID}/epics?per_page=1000&state=opened'
     result = subprocess.run(cmd.split(), stdout=subprocess.PIPE)
-    return json.loads(result.stdout)
+    epics = json.loads(result.stdout)
+    write_completion_words('epics', [(e['id'], e['title']) for e in epics])
+    return epics
+
+def resolve_title_to_id(value, items, kind):
+    """Map a milestone or epic title given on the command line (as offered by completion) to its id."""
+    if value.isdigit():
+        return value
+    matches = [item for item in items if ' '.join(item['title'].split()).lower() == ' '.join(value.split()).lower()]
+    if len(matches) != 1:
+        exit(f"{'No' if not matches else 'More than one'} active {kind} titled '{value}', pass its id instead.")
+    return str(matches[0]['id'])
 
 def select_epic(epics):
     epics = [t['title'] for t in epics]
@@ -306,13 +705,40 @@ def create_merge_request(project_id, branch, issue, labels, milestoneId):
     mr_output = subprocess.check_output(merge_request_command)
     return json.loads(mr_output.decode())
 
-def startIssueCreation(project_id, title, milestone, epic, iteration, selectedSettings, onlyIssue):
-    # Prompt for estimated time
-    estimated_time = inquirer.prompt([
-        inquirer.Text('estimated_time',
-                      message='Estimated time to complete this issue (in minutes, optional)',
-                      validate=lambda _, x: x == '' or x.isdigit())
-    ])['estimated_time']
+def start_branch_fetch(branch):
+    """Fetch just the new branch in background. Negotiation is limited to local main tip, so
+    git doesn't advertise every local ref on repositories with many branches."""
+    command = ['git', 'fetch', '--quiet', '--no-tags', 'origin', f'+refs/heads/{branch}:refs/remotes/origin/{branch}']
+    try:
+        main_ref = f'refs/remotes/origin/{MAIN_BRANCH}'
+        if subprocess.run(['git', 'rev-parse', '--verify', '--quiet', main_ref], stdout=subprocess.DEVNULL).returncode == 0:
+            command.insert(4, f'--negotiation-tip={main_ref}')
+        return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        return None
+
+def checkout_fetched_branch(fetch_process, branch, quiet=False):
+    if fetch_process is None or fetch_process.wait() != 0:
+        error = fetch_process.stderr.read().decode().strip() if fetch_process else 'git not found'
+        print(f"Could not fetch '{branch}': {error}", file=sys.stderr)
+        return False
+    result = subprocess.run(['git', 'checkout', '--quiet', '-b', branch, '--track', f'origin/{branch}'],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        print(f"Could not switch to '{branch}': {result.stderr.decode().strip()}", file=sys.stderr)
+        return False
+    if not quiet:
+        print(f"Switched to new branch '{branch}'.")
+    return True
+
+def startIssueCreation(project_id, title, milestone, epic, iteration, selectedSettings, onlyIssue, estimated_time=None, quiet=False, checkout=False):
+    # Prompt for estimated time, unless it was given on command line
+    if estimated_time is None:
+        estimated_time = inquirer.prompt([
+            inquirer.Text('estimated_time',
+                          message='Estimated time to complete this issue (in minutes, optional)',
+                          validate=lambda _, x: x == '' or x.isdigit())
+        ])['estimated_time']
 
     # If multiple project IDs, split the estimated time
     if isinstance(project_id, list):
@@ -326,30 +752,51 @@ def startIssueCreation(project_id, title, milestone, epic, iteration, selectedSe
         selectedSettings['estimated_time'] = int(estimated_time_per_project)
 
     createdIssue = createIssue(title, project_id, milestone, epic, iteration, selectedSettings)
-    print(f"Issue #{createdIssue['iid']}: {createdIssue['title']} created.")
+    if not quiet:
+        print(f"Issue #{createdIssue['iid']}: {createdIssue['title']} created.")
 
     if onlyIssue:
-        return createdIssue
+        return {'issue': createdIssue, 'merge_request': None}
 
     createdBranch = create_branch(project_id, createdIssue)
 
+    # Branch can only be checked out if the project is the one checked out here
+    is_current_project = getProjectLinkFromCurrentDir() != -1 and str(get_project_id()) == str(project_id)
+
+    # Fetch new branch while merge request is being created
+    fetch_process = start_branch_fetch(createdBranch['name']) if checkout and is_current_project else None
+
     createdMergeRequest = create_merge_request(project_id, createdBranch, createdIssue, selectedSettings.get('labels'), milestone)
-    print(f"Merge request #{createdMergeRequest['iid']}: {createdMergeRequest['title']} created.")
 
-    print("Run:")
-    print("         git fetch origin")
-    print(f"         git checkout -b '{createdMergeRequest['source_branch']}' 'origin/{createdMergeRequest['source_branch']}'")
-    print("to switch to new branch.")
+    # Record branch -> merge request mapping
+    if is_current_project:
+        recordMergeRequestForBranch(createdMergeRequest['source_branch'], project_id, createdMergeRequest['iid'], createdIssue['iid'])
+
+    if not quiet:
+        print(f"Merge request #{createdMergeRequest['iid']}: {createdMergeRequest['title']} created.")
+
+    if checkout and is_current_project and checkout_fetched_branch(fetch_process, createdMergeRequest['source_branch'], quiet):
+        return {'issue': createdIssue, 'merge_request': createdMergeRequest}
+    if checkout and not is_current_project and not quiet:
+        print(f"Not checking out '{createdMergeRequest['source_branch']}', project {project_id} is not checked out here.")
 
-    return createdIssue
+    if not quiet:
+        print("Run:")
+        print("         git fetch origin")
+        print(f"         git checkout -b '{createdMergeRequest['source_branch']}' 'origin/{createdMergeRequest['source_branch']}'")
+        print("to switch to new branch.")
+
+    return {'issue': createdIssue, 'merge_request': createdMergeRequest}
 
 def getCurrentBranch():
-    return subprocess.check_output(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], text=True).strip()
+    return git_metadata.current_branch() or subprocess.check_output(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], text=True).strip()
 
 def openMergeRequestInBrowser():
     try:
         merge_request_id = getActiveMergeRequestId()
-        remote_url = subprocess.check_output(["git", "config", "--get", "remote.origin.url"], text=True).strip()
+        remote_url = getProjectLinkFromCurrentDir()
+        if remote_url == -1:
+            return None
         url = BASE_URL + '/' + remote_url.split(':')[1][:-4]
         webbrowser.open(f"{url}/-/merge_requests/{merge_request_id}")
     except subprocess.CalledProcessError:
@@ -362,8 +809,39 @@ def getActiveMergeRequestId():
 def find_merge_request_id_by_branch(branch_name):
     return getMergeRequestForBranch(branch_name)['iid']
 
+def parseClosedIssueId(description):
+    """Return issue iid from 'Closes #123' merge request description, or None."""
+    try:
+        return description.replace('"','').replace('#','').split()[1]
+    except (AttributeError, IndexError):
+        return None
+
+def recordMergeRequestForBranch(branchName, project_id, mr_iid, issue_iid):
+    """Remember which merge request belongs to branch, so later lookups need no API call."""
+    setGitConfig(f'branch.{branchName}.githappensproject', project_id)
+    setGitConfig(f'branch.{branchName}.githappensmr', mr_iid)
+    if issue_iid:
+        setGitConfig(f'branch.{branchName}.githappensissue', issue_iid)
+
+def getRecordedMergeRequest(branchName, project_id):
+    if getGitConfig(f'branch.{branchName}.githappensproject') != str(project_id):
+        return None
+    mr_iid = getGitConfig(f'branch.{branchName}.githappensmr')
+    if not mr_iid:
+        return None
+    return {
+        'iid': int(mr_iid),
+        'project_id': project_id,
+        'source_branch': branchName,
+        'issue_iid': getGitConfig(f'branch.{branchName}.githappensissue'),
+    }
+
 def getMergeRequestForBranch(branchName):
     project_id = get_project_id()
+    recorded = getRecordedMergeRequest(branchName, project_id)
+    if recorded:
+        return recorded
+
     api_url = f"{API_URL}/projects/{project_id}/merge_requests"
     headers = {"Private-Token": GITLAB_TOKEN}
 
@@ -376,27 +854,64 @@ def getMergeRequestForBranch(branchName):
         merge_requests = response.json()
         for mr in merge_requests:
             if mr["source_branch"] == branchName:
+                recordMergeRequestForBranch(branchName, project_id, mr['iid'], parseClosedIssueId(mr.get('description')))
                 return mr
     else:
         print(f"Failed to fetch Merge Requests: {response.status_code} - {response.text}")
     return None
 
-def chooseReviewersManually():
-    """Prompt the user to select reviewers manually from the available list, showing names."""
-    # Fetch user details for each reviewer ID
-    reviewer_choices = []
-    for reviewer_id in REVIEWERS:
-        api_url = f"{API_URL}/users/{reviewer_id}"
-        headers = {"Private-Token": GITLAB_TOKEN}
+def fetch_reviewer_profiles(reviewer_ids):
+    """Fetch name and username of each reviewer concurrently and store them in the local cache."""
+    headers = {"Private-Token": GITLAB_TOKEN}
+    session = requests.Session()
+
+    def fetch(reviewer_id):
         try:
-            response = requests.get(api_url, headers=headers)
+            response = session.get(f"{API_URL}/users/{reviewer_id}", headers=headers, timeout=10)
             if response.status_code == 200:
                 user = response.json()
-                display_name = f"{user.get('name')} ({user.get('username')})"
-                reviewer_choices.append((display_name, reviewer_id))
-            else:
-                reviewer_choices.append((str(reviewer_id), reviewer_id))
+                return str(reviewer_id), {'name': user.get('name'), 'username': user.get('username')}
         except Exception:
+            pass
+        return str(reviewer_id), None
+
+    with ThreadPoolExecutor(max_workers=min(8, len(reviewer_ids) or 1)) as executor:
+        fetched = dict(executor.map(fetch, reviewer_ids))
+
+    # Keep previously known profiles for reviewers that failed to load this time
+    profiles = read_cache('reviewer_profiles') or {}
+    profiles.update({rid: profile for rid, profile in fetched.items() if profile})
+    write_cache('reviewer_profiles', profiles)
+    # Remember failures for a while, so an unknown reviewer isn't fetched again on every run
+    failures = read_cache('reviewer_profile_failures') or {}
+    failures = {rid: failed_at for rid, failed_at in failures.items() if not fetched.get(rid)}
+    failures.update({rid: time.time() for rid, profile in fetched.items() if not profile})
+    write_cache('reviewer_profile_failures', failures)
+    write_completion_words('reviewers', [(p['username'], p['name']) for p in profiles.values()])
+    return profiles
+
+def get_reviewer_profiles(reviewer_ids):
+    """Return reviewer profiles from cache, refreshing them in the background when cached."""
+    profiles = read_cache('reviewer_profiles', REVIEWER_PROFILES_TTL)
+    failures = read_cache('reviewer_profile_failures') or {}
+    def missing(rid):
+        return str(rid) not in profiles and time.time() - failures.get(str(rid), 0) > REVIEWER_PROFILE_RETRY_AFTER
+    if profiles is None or any(missing(rid) for rid in reviewer_ids):
+        return fetch_reviewer_profiles(reviewer_ids)
+
+    # Daemon, so exit doesn't wait for profiles nobody will read in this run
+    threading.Thread(target=fetch_reviewer_profiles, args=(reviewer_ids,), daemon=True).start()
+    return profiles
+
+def chooseReviewersManually():
+    """Prompt the user to select reviewers manually from the available list, showing names."""
+    profiles = get_reviewer_profiles(REVIEWERS)
+    reviewer_choices = []
+    for reviewer_id in REVIEWERS:
+        profile = profiles.get(str(reviewer_id))
+        if profile:
+            reviewer_choices.append((f"{profile.get('name')} ({profile.get('username')})", reviewer_id))
+        else:
             reviewer_choices.append((str(reviewer_id), reviewer_id))
 
     questions = [
@@ -412,17 +927,97 @@ def chooseReviewersManually():
     else:
         return []
 
+REVIEW_LOAD_TTL = 10 * 60
+REVIEW_LOAD_TIMEOUT = 3
+
+def fetch_review_loads(reviewer_ids, timeout=REVIEW_LOAD_TIMEOUT):
+    """Count open merge requests awaiting review of each reviewer, concurrently.
+
+    Gives up after timeout seconds, reviewers whose count didn't arrive by then are left out.
+    """
+    headers = {"Private-Token": GITLAB_TOKEN}
+    session = requests.Session()
+
+    def fetch(reviewer_id):
+        # Only the X-Total header is needed, so one result per page is enough
+        response = session.get(f"{API_URL}/merge_requests", headers=headers, timeout=timeout, params={
+            'reviewer_id': reviewer_id, 'state': 'opened', 'scope': 'all', 'per_page': 1})
+        response.raise_for_status()
+        total = response.headers.get('X-Total')
+        return int(total) if total else len(response.json())
+
+    executor = ThreadPoolExecutor(max_workers=min(8, len(reviewer_ids) or 1))
+    futures = {executor.submit(fetch, reviewer_id): reviewer_id for reviewer_id in reviewer_ids}
+    done, _ = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+    loads = {}
+    for future in done:
+        try:
+            loads[str(futures[future])] = future.result()
+        except Exception:
+            pass
+
+    cached = read_review_load_cache()
+    fetched_at = time.time()
+    cached.update({rid: {'count': count, 'fetched_at': fetched_at} for rid, count in loads.items()})
+    write_cache('review_loads', cached)
+    return loads
+
+def read_review_load_cache():
+    """Cached review loads as reviewer id -> {'count', 'fetched_at'}, without entries older than REVIEW_LOAD_TTL.
+
+    Each entry expires on its own, so rewriting the file (e.g. counting a new assignment) doesn't
+    keep old counts alive.
+    """
+    cached = read_cache('review_loads') or {}
+    now = time.time()
+    return {rid: entry for rid, entry in cached.items()
+            if isinstance(entry, dict) and now - entry.get('fetched_at', 0) <= REVIEW_LOAD_TTL}
+
+def get_review_loads(reviewer_ids):
+    """Open review count per reviewer id (as string), from cache if fetched in the last few minutes."""
+    loads = {rid: entry['count'] for rid, entry in read_review_load_cache().items()}
+    missing = [rid for rid in reviewer_ids if str(rid) not in loads]
+    if missing:
+        loads.update(fetch_review_loads(missing))
+    return loads
+
+def pick_least_loaded_reviewers(count, reviewer_ids=None):
+    """Return ids of count reviewers with the fewest open merge requests awaiting their review.
+
+    Ties are broken randomly so the same people aren't always picked first. Reviewers whose load
+    is unknown come last.
+    """
+    reviewer_ids = reviewer_ids if reviewer_ids is not None else REVIEWERS
+    loads = get_review_loads(reviewer_ids)
+    ranked = sorted(reviewer_ids, key=lambda rid: (loads.get(str(rid), float('inf')), random.random()))
+    chosen = ranked[:count]
+
+    # Count the new assignments right away, so the next review within cache lifetime picks someone else
+    cached = read_review_load_cache()
+    for rid in chosen:
+        if str(rid) in cached:
+            cached[str(rid)]['count'] += 1
+    write_cache('review_loads', cached)
+
+    profiles = read_cache('reviewer_profiles') or {}
+    for rid in chosen:
+        name = (profiles.get(str(rid)) or {}).get('name') or rid
+        load = loads.get(str(rid))
+        print(f"Picked reviewer {name} ({'unknown' if load is None else load} open reviews)")
+    return chosen
+
 def addReviewersToMergeRequest(reviewers=None):
     project_id = get_project_id()
     mr_id = getActiveMergeRequestId()
-    api_url = f"{API_URL}/projects/{project_id}/merge_requests/{mr_id}"
-    headers = {"Private-Token": GITLAB_TOKEN}
-
-    data = {
-        "reviewer_ids": reviewers if reviewers is not None else REVIEWERS
-    }
+    reviewer_ids = reviewers if reviewers is not None else REVIEWERS
 
-    requests.put(api_url, headers=headers, json=data)
+    enqueue_write(
+        'PUT', f"/projects/{project_id}/merge_requests/{mr_id}",
+        {"reviewer_ids": reviewer_ids},
+        f"Assign reviewers {reviewer_ids} to merge request !{mr_id}",
+        key=f"reviewers:{project_id}:{mr_id}"
+    )
 
 def setMergeRequestToAutoMerge():
     project_id = get_project_id()
@@ -438,12 +1033,111 @@ def setMergeRequestToAutoMerge():
         "auto_merge_strategy": "merge_when_pipeline_succeeds",
     }
 
-    requests.put(api_url, headers=headers, json=data)
+    return requests.put(api_url, headers=headers, json=data)
+
+WATCH_MIN_INTERVAL = 5
+WATCH_MAX_INTERVAL = 60
+
+# Merge statuses that clear up by themselves, any other one keeps auto-merge from happening
+TRANSIENT_MERGE_STATUSES = ('mergeable', 'checking', 'unchecked', 'ci_still_running', 'ci_must_pass', 'preparing', 'approvals_syncing')
+
+def get_merge_blocker(mr):
+    """Reason auto-merge can't happen (e.g. 'conflict', 'not_approved'), None while it still can."""
+    detailed_status = mr.get('detailed_merge_status')
+    if detailed_status:
+        return None if detailed_status in TRANSIENT_MERGE_STATUSES else detailed_status
+    # GitLab older than 15.6 only has merge_status
+    return 'cannot be merged' if mr.get('merge_status') == 'cannot_be_merged' else None
+
+def watch_merge_request():
+    """Follow pipeline and merge request of current branch until they settle. Returns exit code."""
+    project_id = get_project_id()
+    mr_id = getActiveMergeRequestId()
+    session = requests.Session()
+    session.headers.update({"Private-Token": GITLAB_TOKEN})
+    etags = {}
+    responses = {}
+
+    def conditional_get(url):
+        """GET with If-None-Match, returns (data, changed). Unchanged resources cost a 304."""
+        headers = {"If-None-Match": etags[url]} if url in etags else {}
+        response = session.get(url, headers=headers, timeout=30)
+        if response.status_code == 304:
+            return responses[url], False
+        response.raise_for_status()
+        if response.headers.get('ETag'):
+            etags[url] = response.headers['ETag']
+        responses[url] = response.json()
+        return responses[url], True
+
+    mr_url = f"{API_URL}/projects/{project_id}/merge_requests/{mr_id}"
+    interval = WATCH_MIN_INTERVAL
+    pipeline_id = None
+    job_states = {}
+    print(f"👀 Watching merge request !{mr_id} (Ctrl+C to stop)")
+
+    try:
+        while True:
+            mr, mr_changed = conditional_get(mr_url)
+            changed = mr_changed
+
+            if mr['state'] == 'merged':
+                print(f"✅ Merge request !{mr_id} merged.")
+                return 0
+            if mr['state'] == 'closed':
+                print(f"❌ Merge request !{mr_id} was closed.")
+                return 1
+
+            pipeline = mr.get('head_pipeline')
+            if pipeline:
+                if pipeline['id'] != pipeline_id:
+                    pipeline_id = pipeline['id']
+                    job_states = {}
+                    print(f"🔧 Pipeline #{pipeline_id}: {pipeline['web_url']}")
+
+                jobs, jobs_changed = conditional_get(f"{API_URL}/projects/{project_id}/pipelines/{pipeline_id}/jobs?per_page=100")
+                changed = changed or jobs_changed
+                for job in sorted(jobs, key=lambda j: j['id']):
+                    previous = job_states.get(job['id'])
+                    if previous != job['status']:
+                        job_states[job['id']] = job['status']
+                        transition = f"{previous} → {job['status']}" if previous else job['status']
+                        print(f"   {job['stage']}/{job['name']}: {transition}")
+
+                status = pipeline['status']
+                if status in ('failed', 'canceled'):
+                    print(f"❌ Pipeline #{pipeline_id} {status}.")
+                    return 1
+                if status == 'manual':
+                    print(f"⏸️ Pipeline #{pipeline_id} is waiting for a manual job.")
+                    return 1
+                if status in ('success', 'skipped'):
+                    if not mr.get('merge_when_pipeline_succeeds'):
+                        print(f"✅ Pipeline #{pipeline_id} {'passed' if status == 'success' else 'skipped'}.")
+                        return 0
+                    blocker = get_merge_blocker(mr)
+                    if blocker:
+                        print(f"❌ Pipeline #{pipeline_id} {'passed' if status == 'success' else 'skipped'}, but merge request can't be merged: {blocker}.")
+                        return 1
+            elif mr_changed:
+                print("   Waiting for pipeline to start...")
+
+            # Poll quickly while things move, back off while jobs are long-running
+            interval = WATCH_MIN_INTERVAL if changed else min(interval * 1.5, WATCH_MAX_INTERVAL)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 130
+    except requests.RequestException as e:
+        print(f"Error watching merge request: {str(e)}")
+        return 2
 
 def getMainBranch():
-    command = "git symbolic-ref refs/remotes/origin/HEAD | sed 's@^refs/remotes/origin/@@'"
-    output = subprocess.check_output(command, shell=True, stderr=subprocess.STDOUT, universal_newlines=True)
-    return output.strip()
+    main_branch = git_metadata.remote_head_branch()
+    if main_branch:
+        return main_branch
+    # Raises when origin/HEAD isn't set, callers rely on that instead of getting an empty name
+    output = subprocess.check_output(['git', 'symbolic-ref', 'refs/remotes/origin/HEAD'], stderr=subprocess.STDOUT, text=True)
+    return output.strip().replace('refs/remotes/origin/', '', 1)
 
 
 def get_two_weeks_commits(return_output=False):
@@ -515,56 +1209,52 @@ def process_report(text, minutes):
     issue_title = f"Incident Report: {text}"
 
     selected_label = selectLabels('Department')
-
-    incident_settings = {
-        'labels': ['incident', 'report'],
-        'onlyIssue': True,
-        'type': 'incident'
-    }
-
+    labels = ['incident', 'report']
     if selected_label:
-        incident_settings['labels'].append(selected_label)
+        labels.append(selected_label)
 
     try:
-        # Create the incident issue
-        iteration = getActiveIteration()
-        created_issue = createIssue(issue_title, incident_project_id, False, False, iteration, incident_settings)
+        # Assignee, spent time and iteration go in as quick actions, so the issue is complete in one request
+        created_issue = createIncidentIssue(incident_project_id, issue_title, labels, getCachedActiveIteration(), minutes)
         issue_iid = created_issue['iid']
-
-        closeOpenedIssue(issue_iid, incident_project_id)
         print(f"Incident issue #{issue_iid} created successfully.")
         print(f"Title: {issue_title}")
+        print(f"Added {minutes} minutes to issue time tracking.")
 
-        # Add time tracking to the issue
-        time_tracking_command = [
-            "glab", "api",
-            f"/projects/{incident_project_id}/issues/{issue_iid}/add_spent_time",
-            "-f", f"duration={minutes}m"
-        ]
-
-        try:
-            subprocess.run(time_tracking_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            print(f"Added {minutes} minutes to issue time tracking.")
-        except subprocess.CalledProcessError as e:
-            print(f"Error adding time tracking: {str(e)}")
+        # GitLab ignores /close on an issue that is being created, so closing is queued
+        closeOpenedIssue(issue_iid, incident_project_id)
+        print(f"Closing of issue #{issue_iid} queued.")
 
     except Exception as e:
         print(f"Error creating incident issue: {str(e)}")
 
-def closeOpenedIssue(issue_iid, project_id):
+def createIncidentIssue(project_id, title, labels, iteration, minutes):
+    description = "/assign me\n"
+    description += f"/spend {minutes}m\n"
+    if iteration:
+        description += f"/iteration *iteration:{str(iteration['id'])}\n"
+
     issue_command = [
         "glab", "api",
-        f"/projects/{project_id}/issues/{issue_iid}",
-        '-X', 'PUT',
-        '-f', 'state_event=close'
+        f"/projects/{str(project_id)}/issues",
+        "-f", f'title={title}',
+        "-f", 'issue_type=incident',
+        "-f", f'labels={",".join(labels)}',
+        "-f", f'description={description}'
     ]
-    try:
-        subprocess.run(issue_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError as e:
-        print(f"Error closing issue: {str(e)}")
+    issue_output = subprocess.check_output(issue_command)
+    return json.loads(issue_output.decode())
+
+def closeOpenedIssue(issue_iid, project_id):
+    enqueue_write(
+        'PUT', f"/projects/{project_id}/issues/{issue_iid}",
+        {"state_event": "close"},
+        f"Close issue #{issue_iid} of project {project_id}",
+        key=f"close:{project_id}:{issue_iid}"
+    )
 
 def selectLabels(search, multiple = False):
-    labels = getLabelsOfGroup(search)
+    labels = getCachedLabelsOfGroup(search)
     labels = sorted([t['name'] for t in labels])
     
     question_type = inquirer.Checkbox if multiple else inquirer.List
@@ -587,120 +1277,514 @@ def getLabelsOfGroup(search=''):
         print(f"Error getting labels: {str(e)}")
         return []
 
-def getCurrentIssueId():
-    mr = getMergeRequestForBranch(getCurrentBranch())
-    return mr['description'].replace('"','').replace('#','').split()[1]
-
-def track_issue_time():
-    # Get the current merge request
-    try:
-        project_id = get_project_id()
-        issue_id = getCurrentIssueId()
-    except Exception as e:
-        print(f"Error getting issue details: {str(e)}")
-        return
+LABELS_TTL = 7 * 24 * 3600
 
-    # Prompt for actual time spent
-    spent_time = inquirer.prompt([
+def refreshLabelsOfGroup(search=''):
+    labels = getLabelsOfGroup(search)
+    if labels:
+        write_cache(f'labels_{GROUP_ID}_{search}', labels)
+    return labels
+
+def getCachedLabelsOfGroup(search=''):
+    """Return group labels from cache, refreshing them in the background when cached."""
+    labels = read_cache(f'labels_{GROUP_ID}_{search}', LABELS_TTL)
+    if not labels:
+        return refreshLabelsOfGroup(search)
+    threading.Thread(target=refreshLabelsOfGroup, args=(search,)).start()
+    return labels
+
+def getLinkedIssueId(mr):
+    issue_iid = mr.get('issue_iid') or parseClosedIssueId(mr.get('description'))
+    if not issue_iid:
+        raise ValueError(f"no issue linked to merge request !{mr['iid']}")
+    return issue_iid
+
+def prompt_spent_time():
+    return inquirer.prompt([
         inquirer.Text('spent_time',
                       message='How many minutes did you actually spend on this issue?',
                       validate=lambda _, x: x.isdigit())
     ])['spent_time']
 
-    # Add spent time to the issue description
-    time_tracking_command = [
-        "glab", "api",
-        f"/projects/{project_id}/issues/{issue_id}/notes",
-        "-f", f"body=/spend {spent_time}m"
-    ]
-
+def add_spent_time_note(project_id, issue_id, spent_time):
+    # Key is in the note too, so a resend can see whether GitLab already logged this time
+    key = f"spend:{project_id}:{issue_id}:{uuid.uuid4().hex}"
+    enqueue_write(
+        'POST', f"/projects/{project_id}/issues/{issue_id}/notes",
+        {"body": f"/spend {spent_time}m\n{WRITE_MARKER.format(key)}"},
+        f"Add {spent_time} minutes to issue #{issue_id} of project {project_id}",
+        key=key
+    )
+    print(f"Queued {spent_time} minutes for issue {issue_id} time tracking.")
+
+COMPLETION_DIR = os.path.join(CACHE_DIR, 'completion')
+
+def write_completion_words(name, words):
+    """Store completion candidates as 'value:description' lines, read by the shell completion script."""
     try:
-        subprocess.run(time_tracking_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        print(f"Added {spent_time} minutes to issue {issue_id} time tracking.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error adding time tracking: {str(e)}")
-    except Exception as e:
-        print(f"Error tracking issue time: {str(e)}")
+        os.makedirs(COMPLETION_DIR, exist_ok=True)
+        path = os.path.join(COMPLETION_DIR, name)
+        with open(f"{path}.{os.getpid()}.tmp", 'w') as f:
+            for value, description in words:
+                f.write(f"{value}:{' '.join(str(description).split())}\n")
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+    except OSError:
+        pass
 
-def get_last_production_deploy():
-    try:
-        project_id = get_project_id()
-        api_url = f"{API_URL}/projects/{project_id}/pipelines"
-        headers = {"Private-Token": GITLAB_TOKEN}
-
-        # Set up parameters for the pipeline search
-        params = {
-            "per_page": 50,
-            "order_by": "updated_at",
-            "sort": "desc"
-        }
-
-        # Add ref filter if specified in config
-        if MAIN_BRANCH:
-            params["ref"] = MAIN_BRANCH
+COMPLETION_SCRIPT = r'''# GitHappens shell completion. Answers only from local files in __DIR__, never from network.
+_githappens_words() {
+    local line
+    [ -r "__DIR__/$1" ] || return
+    while IFS= read -r line; do
+        printf '%s\n' "${line%%:*}"
+    done < "__DIR__/$1"
+}
+
+# Ids and titles both, titles are mapped back to ids by gitHappens itself
+_githappens_ids_and_titles() {
+    local line title
+    [ -r "__DIR__/$1" ] || return
+    while IFS= read -r line; do
+        [[ "${line%%:*}" == "$2"* ]] && COMPREPLY+=("${line%%:*}")
+        title="$(printf '%q' "${line#*:}")"
+        [[ "$title" == "$2"* || "${line#*:}" == "$2"* ]] && COMPREPLY+=("$title")
+    done < "__DIR__/$1"
+}
+
+_githappens() {
+    local cur prev IFS=$'\n'
+    cur="${COMP_WORDS[COMP_CWORD]}"
+    prev="${COMP_WORDS[COMP_CWORD-1]}"
+    COMPREPLY=()
+
+    case "$prev" in
+        --template)
+            local name
+            for name in $(_githappens_words templates); do
+                [[ "$name" == "$cur"* ]] && COMPREPLY+=("$(printf '%q' "$name")")
+            done
+            return ;;
+        --milestone_id)
+            [[ "current" == "$cur"* ]] && COMPREPLY+=("current")
+            _githappens_ids_and_titles milestones "$cur"
+            return ;;
+        --iteration) COMPREPLY=($(compgen -W "current" -- "$cur")); return ;;
+        --epic_id) _githappens_ids_and_titles epics "$cur"; return ;;
+        --reviewers)
+            local prefix=""
+            [[ "$cur" == *,* ]] && prefix="${cur%,*},"
+            COMPREPLY=($(compgen -P "$prefix" -W "$(_githappens_words reviewers)" -- "${cur##*,}"))
+            return ;;
+        --project_id|--estimate|--days|--stale_days|--workers|--mr|--least_loaded) return ;;
+    esac
+
+    if [[ "$cur" == -* ]]; then
+        COMPREPLY=($(compgen -W "__FLAGS__" -- "$cur"))
+        return
+    fi
+
+    if [ "$COMP_CWORD" -eq 1 ]; then
+        COMPREPLY=($(compgen -W "__COMMANDS__" -- "$cur"))
+    elif [ "$COMP_CWORD" -eq 2 ]; then
+        case "$prev" in
+            last) COMPREPLY=($(compgen -W "deploy" -- "$cur")) ;;
+            deploy) COMPREPLY=($(compgen -W "history" -- "$cur")) ;;
+            time) COMPREPLY=($(compgen -W "report" -- "$cur")) ;;
+            ai) COMPREPLY=($(compgen -W "review" -- "$cur")) ;;
+            queue) COMPREPLY=($(compgen -W "flush"$'\n'"retry"$'\n'"drop" -- "$cur")) ;;
+            release) COMPREPLY=($(compgen -W "notes" -- "$cur")) ;;
+            completion) COMPREPLY=($(compgen -W "bash"$'\n'"zsh" -- "$cur")) ;;
+        esac
+    fi
+}
+'''
+
+COMPLETION_COMMANDS = ['open', 'review', 'watch', 'summary', 'summaryAI', 'report', 'last', 'deploy', 'time', 'ai', 'queue', 'cleanup', 'release', 'completion']
+
+def print_completion_script(parser, shell, alias='gh'):
+    """Print bash or zsh completion script for alias. Also refreshes template candidates."""
+    if shell not in ('bash', 'zsh'):
+        exit("Usage: gh completion bash|zsh")
+
+    write_completion_words('templates', [(t['name'], t['name']) for t in TEMPLATES])
+    flags = [option for action in parser._actions if action.help != argparse.SUPPRESS for option in action.option_strings]
+    script = (COMPLETION_SCRIPT
+              .replace('__DIR__', COMPLETION_DIR)
+              .replace('__FLAGS__', '\n'.join(flags))
+              .replace('__COMMANDS__', '\n'.join(COMPLETION_COMMANDS)))
+    if shell == 'zsh':
+        script = "autoload -U +X bashcompinit && bashcompinit\n" + script
+    print(script + f"complete -F _githappens {alias}")
+
+def resolve_reviewer_usernames(usernames):
+    """Map comma separated reviewer usernames (or ids) to ids using cached reviewer profiles."""
+    profiles = get_reviewer_profiles(REVIEWERS)
+    ids_by_username = {profile['username']: int(rid) for rid, profile in profiles.items() if profile}
+    reviewer_ids = []
+    for username in filter(None, (u.strip() for u in usernames.split(','))):
+        if username.isdigit():
+            reviewer_ids.append(int(username))
+        elif username in ids_by_username:
+            reviewer_ids.append(ids_by_username[username])
         else:
-            # Use main branch if no specific ref is configured
+            print(f"Unknown reviewer '{username}', skipping.")
+    return reviewer_ids
+
+def run_task_graph(tasks, max_workers=4):
+    """Run tasks on a thread pool as soon as their dependencies succeed.
+
+    tasks maps name to (function, [dependency names]). Each function gets dict of results
+    of finished tasks. Returns dict of name -> (status, result or error), status being
+    'ok', 'failed' or 'skipped' (a dependency did not succeed).
+    """
+    for name, (_, dependencies) in tasks.items():
+        unknown = [dep for dep in dependencies if dep not in tasks]
+        if unknown:
+            raise ValueError(f"task '{name}' depends on unknown task(s): {', '.join(unknown)}")
+
+    outcomes = {}
+    results = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while len(outcomes) < len(tasks):
+            for name, (function, dependencies) in tasks.items():
+                if name in outcomes or name in running.values():
+                    continue
+                if any(outcomes[dep][0] != 'ok' for dep in dependencies if dep in outcomes):
+                    outcomes[name] = ('skipped', 'dependency did not succeed')
+                elif all(dep in outcomes for dep in dependencies):
+                    running[executor.submit(function, dict(results))] = name
+
+            if not running:
+                if len(outcomes) < len(tasks):
+                    # Nothing runs and nothing got ready, remaining tasks wait on each other
+                    waiting = [name for name in tasks if name not in outcomes]
+                    raise ValueError(f"task dependencies form a cycle: {', '.join(waiting)}")
+                continue
+            done = next(as_completed(running))
+            name = running.pop(done)
             try:
-                main_branch = getMainBranch()
-                params["ref"] = main_branch
-            except:
-                # Fallback to common main branch names
-                params["ref"] = "main"
+                results[name] = done.result()
+                outcomes[name] = ('ok', results[name])
+            except Exception as e:
+                outcomes[name] = ('failed', e)
+    return outcomes
+
+def run_review_workflow(args):
+    """Submit merge request of current branch into review, running independent steps concurrently."""
+    # Every step needs the merge request, and time is asked for only when there is one to log it on
+    try:
+        project_id = get_project_id()
+        merge_request = getMergeRequestForBranch(getCurrentBranch())
+    except Exception as e:
+        print(f"Error finding merge request: {str(e)}")
+        return
+    if not merge_request:
+        print("No merge request found for current branch.")
+        return
 
-        response = requests.get(api_url, headers=headers, params=params)
+    # Prompts need the terminal, so they happen before anything runs in background
+    spent_time = prompt_spent_time()
+    reviewers = None
+    if getattr(args, "select", False):
+        reviewers = chooseReviewersManually()
+    elif args.reviewers:
+        reviewers = resolve_reviewer_usernames(args.reviewers)
 
-        if response.status_code != 200:
-            print(f"Failed to fetch pipelines: {response.status_code} - {response.text}")
-            return
+    mr_id = merge_request['iid']
 
-        pipelines = response.json()
-        production_pipeline = None
+    def post_spent_time(_):
+        add_spent_time_note(project_id, getLinkedIssueId(merge_request), spent_time)
 
-        # Look for production pipeline by name pattern
-        for pipeline in pipelines:
-            # Get pipeline details to check jobs
-            pipeline_detail_url = f"{API_URL}/projects/{project_id}/pipelines/{pipeline['id']}/jobs"
-            detail_response = requests.get(pipeline_detail_url, headers=headers)
+    def pick_reviewers(_):
+        if args.least_loaded and reviewers is None:
+            return pick_least_loaded_reviewers(args.least_loaded)
+        return reviewers
 
-            if detail_response.status_code == 200:
-                jobs = detail_response.json()
+    def assign_reviewers(results):
+        addReviewersToMergeRequest(reviewers=results['reviewer load'])
 
-                # Check if this pipeline contains production deployment
-                for job in jobs:
-                    job_name = job.get('name', '')
-                    stage = job.get('stage', '')
-                    job_status = job.get('status', '').lower()
+    def ai_review(_):
+        from ai_code_review import run_review_for_mr
+        run_review_for_mr(project_id, mr_id, GITLAB_TOKEN, API_URL, full=args.full_review, resolve_stale=args.resolve_stale, stream=args.stream, remote=args.remote)
 
-                    # Only consider successful jobs
-                    if job_status != 'success':
-                        continue
+    def auto_merge(_):
+        setMergeRequestToAutoMerge().raise_for_status()
 
-                    # Check project-specific mapping first
-                    project_mapping = PRODUCTION_MAPPINGS.get(str(project_id))
-                    if project_mapping:
-                        expected_stage = project_mapping.get('stage', '').lower()
-                        expected_job = project_mapping.get('job', '').lower()
-
-                        if (stage.lower() == expected_stage or
-                            (expected_job and job_name.lower() == expected_job)):
-                            production_pipeline = {
-                                'pipeline': pipeline,
-                                'production_job': job
-                            }
-                            break
-                    else:
-                        print('Didn\'t find deployment pipeline')
+    tasks = {
+        'spent time': (post_spent_time, []),
+        'reviewer load': (pick_reviewers, []),
+        'reviewers': (assign_reviewers, ['reviewer load']),
+        'ai review': (ai_review, []),
+    }
+    if args.auto_merge:
+        # Last, so the merge request can't merge before reviewers and findings are on it
+        tasks['auto merge'] = (auto_merge, ['reviewers', 'ai review'])
+
+    outcomes = run_task_graph(tasks)
+
+    print("\nReview steps:")
+    icons = {'ok': '✅', 'failed': '❌', 'skipped': '⏭️'}
+    for name in tasks:
+        status, detail = outcomes[name]
+        line = f"   {icons[status]} {name}"
+        if status != 'ok':
+            line += f": {detail}"
+        print(line)
+
+def graphql_query(query, variables=None):
+    """Run GitLab GraphQL query and return its data, raising on errors."""
+    response = requests.post(
+        f"{BASE_URL}/api/graphql",
+        headers={"Authorization": f"Bearer {GITLAB_TOKEN}"},
+        json={"query": query, "variables": variables or {}},
+        timeout=30
+    )
+    response.raise_for_status()
+    body = response.json()
+    if body.get('errors'):
+        raise RuntimeError(body['errors'][0].get('message'))
+    return body['data']
+
+def get_group_full_path():
+    """Full path of configured group, needed for GraphQL. Cached, it practically never changes."""
+    cached = read_cache(f"group_{GROUP_ID}")
+    if cached:
+        return cached['full_path']
+    response = requests.get(f"{API_URL}/groups/{GROUP_ID}", headers={"Private-Token": GITLAB_TOKEN},
+                            params={"with_projects": "false"}, timeout=30)
+    response.raise_for_status()
+    write_cache(f"group_{GROUP_ID}", {'full_path': response.json()['full_path']})
+    return response.json()['full_path']
+
+def get_paginated(url, params=None, session=None):
+    """GET every page of a REST list endpoint."""
+    session = session or requests.Session()
+    params = dict(params or {}, per_page=100)
+    items = []
+    page = 1
+    while page:
+        params['page'] = page
+        response = session.get(url, headers={"Private-Token": GITLAB_TOKEN}, params=params, timeout=30)
+        response.raise_for_status()
+        items.extend(response.json())
+        page = int(response.headers.get('X-Next-Page') or 0)
+    return items
+
+TIMELOGS_QUERY = """
+query($fullPath: ID!, $startTime: Time, $endTime: Time, $after: String) {
+  group(fullPath: $fullPath) {
+    timelogs(startTime: $startTime, endTime: $endTime, first: 100, after: $after) {
+      nodes { id timeSpent spentAt user { username } issue { iid projectId } }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
+
+def fetch_timelogs(start_date, due_date, cache_key):
+    """Return timelogs of group spent between dates. Cached, re-runs only fetch entries from last sync on."""
+    cached = read_cache(cache_key) or {'entries': {}, 'synced_until': None}
+    entries = cached['entries']
+
+    # Overlap one day with previous sync, entries are deduplicated by id
+    start_time = f"{start_date}T00:00:00Z"
+    if cached['synced_until']:
+        resume = (datetime.datetime.fromisoformat(cached['synced_until'].replace('Z', '+00:00')) - datetime.timedelta(days=1))
+        start_time = max(start_time, resume.strftime('%Y-%m-%dT%H:%M:%SZ'))
+    now = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    end_time = min(f"{due_date}T23:59:59Z", now)
+
+    full_path = get_group_full_path()
+    after = None
+    while True:
+        data = graphql_query(TIMELOGS_QUERY, {"fullPath": full_path, "startTime": start_time, "endTime": end_time, "after": after})
+        timelogs = data['group']['timelogs']
+        for node in timelogs['nodes']:
+            if node.get('issue'):
+                entries[node['id']] = {
+                    'seconds': node['timeSpent'],
+                    'user': (node.get('user') or {}).get('username', 'unknown'),
+                    'issue': f"{node['issue']['projectId']}:{node['issue']['iid']}",
+                }
+        if not timelogs['pageInfo']['hasNextPage']:
+            break
+        after = timelogs['pageInfo']['endCursor']
+
+    write_cache(cache_key, {'entries': entries, 'synced_until': end_time})
+    return list(entries.values())
+
+def get_time_report_scope(args):
+    """Resolve milestone or iteration the report is about. Returns (name, issue filter params, start, due),
+    or None when there is no current milestone or iteration."""
+    headers = {"Private-Token": GITLAB_TOKEN}
+    if args.milestone_id:
+        if args.milestone_id == 'current':
+            milestone = list_milestones(True)
+            if not milestone:
+                return None
+        else:
+            response = requests.get(f"{API_URL}/groups/{GROUP_ID}/milestones/{args.milestone_id}", headers=headers, timeout=30)
+            response.raise_for_status()
+            milestone = response.json()
+        return f"milestone {milestone['title']}", {"milestone": milestone['title']}, milestone['start_date'], milestone['due_date']
+
+    if args.iteration and args.iteration != 'current':
+        data = graphql_query("query($id: IterationID!) { iteration(id: $id) { id startDate dueDate } }",
+                             {"id": f"gid://gitlab/Iteration/{args.iteration}"})
+        iteration = data['iteration']
+        return f"iteration {iteration['startDate']} - {iteration['dueDate']}", {"iteration_id": args.iteration}, iteration['startDate'], iteration['dueDate']
+
+    iteration = getActiveIteration()
+    if not iteration:
+        return None
+    return f"iteration {iteration['start_date']} - {iteration['due_date']}", {"iteration_id": iteration['id']}, iteration['start_date'], iteration['due_date']
+
+def format_hours(seconds):
+    return f"{seconds / 3600:.1f}h"
+
+def print_time_table(title, rows):
+    print(f"\n{title}")
+    rows = [("", "Estimate", "Spent")] + sorted(rows, key=lambda r: -r[2])
+    width = max(len(str(row[0])) for row in rows)
+    for name, estimate, spent in rows:
+        if isinstance(estimate, int):
+            estimate, spent = format_hours(estimate), format_hours(spent)
+        print(f"   {str(name).ljust(width)}  {str(estimate).rjust(8)}  {str(spent).rjust(8)}")
+
+def show_time_report(args):
+    """Print estimate vs spent time of current iteration (or given milestone/iteration) by person, label and epic.
+
+    Person totals come from timelogs spent in the period, label and epic totals from issue time stats.
+    """
+    scope = get_time_report_scope(args)
+    if not scope:
+        print("No current milestone or iteration to report on, pass --milestone_id or --iteration.")
+        return
+    name, issue_filter, start_date, due_date = scope
+    if not start_date or not due_date:
+        print(f"Can't make report, {name} has no start or due date.")
+        return
+
+    session = requests.Session()
+    issues = get_paginated(f"{API_URL}/groups/{GROUP_ID}/issues", dict(issue_filter, scope="all"), session)
+    cache_key = f"timelogs_{GROUP_ID}_{'_'.join(f'{k}-{v}' for k, v in issue_filter.items())}"
+    cache_key = re.sub(r'[^\w.-]', '_', cache_key)
+    issue_keys = {f"{issue['project_id']}:{issue['iid']}" for issue in issues}
+    timelogs = [t for t in fetch_timelogs(start_date, due_date, cache_key) if t['issue'] in issue_keys]
+
+    by_person = {}
+    for issue in issues:
+        for assignee in issue.get('assignees') or []:
+            by_person.setdefault(assignee['username'], [0, 0])[0] += issue['time_stats']['time_estimate']
+    for timelog in timelogs:
+        by_person.setdefault(timelog['user'], [0, 0])[1] += timelog['seconds']
+
+    by_label = {}
+    by_epic = {}
+    for issue in issues:
+        estimate = issue['time_stats']['time_estimate']
+        spent = issue['time_stats']['total_time_spent']
+        for label in issue.get('labels') or ['(no label)']:
+            totals = by_label.setdefault(label, [0, 0])
+            totals[0] += estimate
+            totals[1] += spent
+        epic = (issue.get('epic') or {}).get('title', '(no epic)')
+        totals = by_epic.setdefault(epic, [0, 0])
+        totals[0] += estimate
+        totals[1] += spent
+
+    total_estimate = sum(issue['time_stats']['time_estimate'] for issue in issues)
+    total_spent = sum(issue['time_stats']['total_time_spent'] for issue in issues)
+    print(f"⏱️  Time report for {name}: {len(issues)} issues, estimate {format_hours(total_estimate)}, spent {format_hours(total_spent)}")
+    print_time_table("By person:", [(k, v[0], v[1]) for k, v in by_person.items()])
+    print_time_table("By label:", [(k, v[0], v[1]) for k, v in by_label.items()])
+    print_time_table("By epic:", [(k, v[0], v[1]) for k, v in by_epic.items()])
+
+def get_production_pipeline_params():
+    # Set up parameters for the pipeline search
+    params = {
+        "per_page": 50,
+        "order_by": "updated_at",
+        "sort": "desc"
+    }
 
-                if production_pipeline:
-                    break
+    # Add ref filter if specified in config
+    if MAIN_BRANCH:
+        params["ref"] = MAIN_BRANCH
+    else:
+        # Use main branch if no specific ref is configured
+        try:
+            main_branch = getMainBranch()
+            params["ref"] = main_branch
+        except:
+            # Fallback to common main branch names
+            params["ref"] = "main"
+    return params
+
+def is_production_job(job, project_mapping):
+    # Only consider successful jobs
+    if job.get('status', '').lower() != 'success':
+        return False
+
+    expected_stage = project_mapping.get('stage', '').lower()
+    expected_job = project_mapping.get('job', '').lower()
+    return (job.get('stage', '').lower() == expected_stage or
+            (expected_job and job.get('name', '').lower() == expected_job))
+
+def find_production_deploys(project_id, session=None, limit=1):
+    """Return up to limit latest successful production deploys of project as {'pipeline', 'production_job'} dicts."""
+    session = session or requests.Session()
+    headers = {"Private-Token": GITLAB_TOKEN}
 
-        if not production_pipeline:
+    project_mapping = PRODUCTION_MAPPINGS.get(str(project_id))
+    if not project_mapping:
+        print('Didn\'t find deployment pipeline')
+        return []
+
+    api_url = f"{API_URL}/projects/{project_id}/pipelines"
+    response = session.get(api_url, headers=headers, params=get_production_pipeline_params(), timeout=30)
+    if response.status_code != 200:
+        raise RuntimeError(f"Failed to fetch pipelines: {response.status_code} - {response.text}")
+
+    deploys = []
+    # Look for production pipeline by checking its jobs
+    for pipeline in response.json():
+        pipeline_detail_url = f"{API_URL}/projects/{project_id}/pipelines/{pipeline['id']}/jobs"
+        detail_response = session.get(pipeline_detail_url, headers=headers, timeout=30)
+        if detail_response.status_code != 200:
+            continue
+
+        job = next((j for j in detail_response.json() if is_production_job(j, project_mapping)), None)
+        if job:
+            deploys.append({'pipeline': pipeline, 'production_job': job})
+            if len(deploys) >= limit:
+                break
+    return deploys
+
+def format_time_ago(timestamp):
+    finished_time = datetime.datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    time_diff = datetime.datetime.now(datetime.timezone.utc) - finished_time
+
+    if time_diff.days > 0:
+        return f"{time_diff.days} days ago"
+    elif time_diff.seconds > 3600:
+        return f"{time_diff.seconds // 3600} hours ago"
+    return f"{time_diff.seconds // 60} minutes ago"
+
+def get_last_production_deploy():
+    try:
+        project_id = get_project_id()
+        deploys = find_production_deploys(project_id)
+
+        if not deploys:
             print(f"No production deployment found matching pattern")
             return
 
         # Display the results
-        pipeline = production_pipeline['pipeline']
-        job = production_pipeline['production_job']
+        pipeline = deploys[0]['pipeline']
+        job = deploys[0]['production_job']
 
         print(f"🚀 Last Production Deployment:")
         print(f"   Pipeline: #{pipeline['id']} - {pipeline['status']}")
@@ -715,23 +1799,488 @@ def get_last_production_deploy():
         # Show time since deployment
         if job.get('finished_at'):
             try:
-                finished_time = datetime.datetime.fromisoformat(job['finished_at'].replace('Z', '+00:00'))
-                time_diff = datetime.datetime.now(datetime.timezone.utc) - finished_time
-
-                if time_diff.days > 0:
-                    print(f"   ⏰ {time_diff.days} days ago")
-                elif time_diff.seconds > 3600:
-                    hours = time_diff.seconds // 3600
-                    print(f"   ⏰ {hours} hours ago")
-                else:
-                    minutes = time_diff.seconds // 60
-                    print(f"   ⏰ {minutes} minutes ago")
+                print(f"   ⏰ {format_time_ago(job['finished_at'])}")
             except:
                 pass
 
     except Exception as e:
         print(f"Error fetching last production deploy: {str(e)}")
 
+def get_all_last_production_deploys():
+    """Print last production deploy of every project in productionMappings, querying them concurrently."""
+    if not PRODUCTION_MAPPINGS:
+        print("No productionMappings configured in templates.json")
+        return
+
+    # One pooled session shared by all workers, so connections are reused
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=len(PRODUCTION_MAPPINGS))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    def fetch(project_id):
+        try:
+            return project_id, find_production_deploys(project_id, session), None
+        except Exception as e:
+            return project_id, [], str(e)
+
+    with ThreadPoolExecutor(max_workers=len(PRODUCTION_MAPPINGS)) as executor:
+        results = list(executor.map(fetch, PRODUCTION_MAPPINGS.keys()))
+
+    rows = [("Project", "Deployed", "Age", "Commit", "Pipeline")]
+    for project_id, deploys, error in results:
+        name = PRODUCTION_MAPPINGS[project_id].get('name', project_id)
+        if error:
+            rows.append((name, "error", error[:40], "", ""))
+        elif not deploys:
+            rows.append((name, "-", "", "", ""))
+        else:
+            pipeline = deploys[0]['pipeline']
+            finished_at = deploys[0]['production_job'].get('finished_at')
+            rows.append((
+                name,
+                finished_at[:16].replace('T', ' ') if finished_at else 'N/A',
+                format_time_ago(finished_at) if finished_at else '',
+                pipeline['sha'][:8],
+                f"#{pipeline['id']}",
+            ))
+
+    widths = [max(len(str(row[i])) for row in rows) for i in range(len(rows[0]))]
+    print("🚀 Last Production Deployments:")
+    for row in rows:
+        print("   " + "  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+DEPLOY_HISTORY_DB = os.path.join(CACHE_DIR, 'deploy_history.sqlite')
+DEPLOY_HISTORY_INITIAL_DAYS = 180
+
+def open_deploy_history():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    db = sqlite3.connect(DEPLOY_HISTORY_DB)
+    db.execute("""CREATE TABLE IF NOT EXISTS deploys (
+        project_id TEXT NOT NULL,
+        pipeline_id INTEGER NOT NULL,
+        sha TEXT NOT NULL,
+        ref TEXT,
+        job_name TEXT,
+        finished_at TEXT,
+        duration REAL,
+        web_url TEXT,
+        PRIMARY KEY (project_id, pipeline_id))""")
+    db.execute("CREATE INDEX IF NOT EXISTS deploys_finished_at ON deploys (project_id, finished_at)")
+    db.execute("""CREATE TABLE IF NOT EXISTS sync_state (
+        project_id TEXT PRIMARY KEY,
+        updated_after TEXT NOT NULL)""")
+    return db
+
+def sync_deploy_history(db, project_id, session=None):
+    """Fetch pipelines updated since the last sync and store their production deploys. Returns number of new deploys."""
+    session = session or requests.Session()
+    headers = {"Private-Token": GITLAB_TOKEN}
+    project_id = str(project_id)
+    project_mapping = PRODUCTION_MAPPINGS.get(project_id)
+    if not project_mapping:
+        raise RuntimeError(f"no productionMappings entry for project {project_id}")
+
+    row = db.execute("SELECT updated_after FROM sync_state WHERE project_id = ?", (project_id,)).fetchone()
+    if row:
+        updated_after = row[0]
+    else:
+        since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=DEPLOY_HISTORY_INITIAL_DAYS)
+        updated_after = since.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    params = get_production_pipeline_params()
+    params.update({"per_page": 100, "sort": "asc", "updated_after": updated_after})
+
+    def fetch_production_job(pipeline):
+        url = f"{API_URL}/projects/{project_id}/pipelines/{pipeline['id']}/jobs"
+        response = session.get(url, headers=headers, params={"scope[]": "success", "per_page": 100}, timeout=30)
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch jobs of pipeline {pipeline['id']}: {response.status_code}")
+        return next((j for j in response.json() if is_production_job(j, project_mapping)), None)
+
+    new_deploys = 0
+    page = 1
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        while page:
+            params["page"] = page
+            response = session.get(f"{API_URL}/projects/{project_id}/pipelines", headers=headers, params=params, timeout=30)
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to fetch pipelines: {response.status_code} - {response.text}")
+            pipelines = response.json()
+
+            # Unfinished pipelines are picked up again once they finish, because their updated_at changes
+            finished = [p for p in pipelines if p['status'] not in ('created', 'waiting_for_resource', 'preparing', 'pending', 'running', 'manual', 'scheduled')]
+            for pipeline, job in zip(finished, executor.map(fetch_production_job, finished)):
+                if job:
+                    # Pipelines at the sync boundary come back every run, count only deploys not stored yet
+                    cursor = db.execute(
+                        "INSERT OR IGNORE INTO deploys VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (project_id, pipeline['id'], pipeline['sha'], pipeline['ref'], job['name'],
+                         job.get('finished_at'), job.get('duration'), pipeline['web_url'])
+                    )
+                    new_deploys += cursor.rowcount
+                    if not cursor.rowcount:
+                        # Retried job finishes later, keep what it reports now
+                        db.execute(
+                            "UPDATE deploys SET job_name = ?, finished_at = ?, duration = ? WHERE project_id = ? AND pipeline_id = ?",
+                            (job['name'], job.get('finished_at'), job.get('duration'), project_id, pipeline['id'])
+                        )
+
+            # Save progress after every page, so an interrupted sync resumes where it stopped
+            if pipelines:
+                newest = max(p['updated_at'] for p in pipelines)
+                db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (project_id, newest))
+            db.commit()
+            page = int(response.headers.get('X-Next-Page') or 0)
+
+    return new_deploys
+
+def show_deploy_history(all_projects=False, days=30):
+    """Sync local deploy history and print deploys per day, time between deploys and deployed commits."""
+    project_ids = list(PRODUCTION_MAPPINGS.keys()) if all_projects else [str(get_project_id())]
+    db = open_deploy_history()
+    session = requests.Session()
+
+    for project_id in project_ids:
+        try:
+            new_deploys = sync_deploy_history(db, project_id, session)
+            if new_deploys:
+                print(f"Synced {new_deploys} deploy(s) of project {project_id}.")
+        except Exception as e:
+            print(f"Error syncing deploy history of project {project_id}: {str(e)}")
+
+    since = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)).strftime('%Y-%m-%dT%H:%M:%S')
+    for project_id in project_ids:
+        name = PRODUCTION_MAPPINGS.get(project_id, {}).get('name', project_id)
+        deploys = db.execute(
+            "SELECT finished_at, sha, pipeline_id FROM deploys WHERE project_id = ? AND finished_at >= ? ORDER BY finished_at",
+            (project_id, since)
+        ).fetchall()
+
+        print(f"\n🚀 Production deploys of {name} in the last {days} days: {len(deploys)}")
+        if not deploys:
+            continue
+
+        print("   Per day:")
+        for day, count in db.execute(
+            "SELECT substr(finished_at, 1, 10) AS day, COUNT(*) FROM deploys WHERE project_id = ? AND finished_at >= ? GROUP BY day ORDER BY day",
+            (project_id, since)
+        ):
+            print(f"     {day}  {'█' * count} {count}")
+
+        times = [datetime.datetime.fromisoformat(d[0].replace('Z', '+00:00')) for d in deploys]
+        gaps = [(b - a).total_seconds() / 3600 for a, b in zip(times, times[1:])]
+        if gaps:
+            gaps.sort()
+            print(f"   Time between deploys: median {gaps[len(gaps) // 2]:.1f} h, longest {gaps[-1]:.1f} h")
+
+        print("   Deployed commits:")
+        for finished_at, sha, pipeline_id in reversed(deploys):
+            print(f"     {finished_at[:16].replace('T', ' ')}  {sha[:8]}  pipeline #{pipeline_id}")
+
+    db.close()
+
+def get_first_parent_chain(commits, head_sha):
+    """SHAs of commits reached from head_sha by first parents, within commits of a compare range.
+
+    These are the merge, squash and directly pushed commits, not the commits inside merged branches.
+    """
+    by_sha = {commit['id']: commit for commit in commits}
+    chain = []
+    sha = head_sha
+    while sha in by_sha:
+        chain.append(sha)
+        parents = by_sha[sha].get('parent_ids') or []
+        sha = parents[0] if parents else None
+    return chain
+
+def resolve_merge_requests_for_commits(project_id, commits, chain, session, cache_direct=True):
+    """Map each commit of chain to merged MR summary (or None for direct pushes).
+
+    Merged MRs are listed in bulk and matched by merge, squash or head SHA, only commits left
+    unmatched are looked up one by one. Matches are cached per SHA, commits never change. A commit
+    without MR is cached only with cache_direct, i.e. when it is already deployed; an unreleased
+    commit may still get merged through an MR later.
+    """
+    cache_name = f"release_mrs_{project_id}"
+    cached = read_cache(cache_name) or {}
+    missing = [sha for sha in chain if sha not in cached]
+    if not missing:
+        return {sha: cached[sha] for sha in chain}
+
+    def summary(mr):
+        return {'iid': mr['iid'], 'title': mr['title'], 'labels': mr.get('labels', []),
+                'author': (mr.get('author') or {}).get('username'), 'web_url': mr.get('web_url')}
+
+    # A merged MR was updated at or after its merge, so nothing older than the oldest commit can match
+    committed = {commit['id']: commit['committed_date'] for commit in commits}
+    oldest = min(datetime.datetime.fromisoformat(committed[sha].replace('Z', '+00:00')) for sha in missing)
+    updated_after = (oldest - datetime.timedelta(hours=1)).isoformat()
+    merged = get_paginated_concurrent(f"{API_URL}/projects/{project_id}/merge_requests",
+                                      {'state': 'merged', 'updated_after': updated_after}, session)
+    by_sha = {}
+    for mr in merged:
+        for key in ('sha', 'squash_commit_sha', 'merge_commit_sha'):
+            if mr.get(key):
+                by_sha[mr[key]] = summary(mr)
+
+    unmatched = [sha for sha in missing if sha not in by_sha]
+
+    def lookup(sha):
+        response = session.get(f"{API_URL}/projects/{project_id}/repository/commits/{sha}/merge_requests",
+                               headers={"Private-Token": GITLAB_TOKEN}, timeout=30)
+        response.raise_for_status()
+        mrs = [mr for mr in response.json() if mr.get('state') == 'merged']
+        return sha, summary(mrs[0]) if mrs else None
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        by_sha.update(dict(executor.map(lookup, unmatched)))
+
+    for sha in missing:
+        if by_sha.get(sha) or cache_direct:
+            cached[sha] = by_sha.get(sha)
+    write_cache(cache_name, cached)
+    return {sha: cached.get(sha, by_sha.get(sha)) for sha in chain}
+
+def release_notes_group(labels):
+    """Label a merge request is listed under: first of releaseNotesLabels it has, else its first label."""
+    for label in RELEASE_NOTES_LABELS:
+        if label in labels:
+            return label
+    return labels[0] if labels else 'Other'
+
+def show_release_notes(pending=False):
+    """Print release notes (merged MRs grouped by label) between the last two production deploys,
+    or with pending between the last deploy and local HEAD."""
+    session = requests.Session()
+    try:
+        project_id = get_project_id()
+        deploys = find_production_deploys(project_id, session, limit=1 if pending else 2)
+    except Exception as e:
+        print(f"Error finding production deploys: {str(e)}")
+        return
+
+    if pending:
+        if not deploys:
+            print("No production deployment found")
+            return
+        from_sha = deploys[0]['pipeline']['sha']
+        to_sha = git_metadata.resolve_ref('HEAD') or subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True).strip()
+        title = f"Changes since last deploy ({from_sha[:8]}..{to_sha[:8]})"
+    else:
+        if len(deploys) < 2:
+            print("Need two production deployments to compare, use --pending to compare last deploy with HEAD")
+            return
+        to_sha, from_sha = deploys[0]['pipeline']['sha'], deploys[1]['pipeline']['sha']
+        finished = (deploys[0]['production_job'].get('finished_at') or '')[:10]
+        title = f"Release {finished} ({from_sha[:8]}..{to_sha[:8]})"
+
+    if from_sha == to_sha:
+        print("Nothing changed between deploys.")
+        return
+
+    response = session.get(f"{API_URL}/projects/{project_id}/repository/compare",
+                           headers={"Private-Token": GITLAB_TOKEN},
+                           params={'from': from_sha, 'to': to_sha, 'straight': 'true'}, timeout=60)
+    if response.status_code != 200:
+        print(f"Failed to compare {from_sha[:8]}..{to_sha[:8]}: {response.status_code} (is HEAD pushed?)")
+        return
+    commits = response.json().get('commits', [])
+    chain = get_first_parent_chain(commits, to_sha) or [commit['id'] for commit in commits]
+
+    try:
+        merge_requests = resolve_merge_requests_for_commits(project_id, commits, chain, session,
+                                                            cache_direct=not pending)
+    except Exception as e:
+        print(f"Error resolving merge requests: {str(e)}")
+        return
+
+    groups = {}
+    seen = set()
+    direct = []
+    titles = {commit['id']: commit['title'] for commit in commits}
+    for sha in reversed(chain):
+        mr = merge_requests.get(sha)
+        if not mr:
+            direct.append(sha)
+        elif mr['iid'] not in seen:
+            seen.add(mr['iid'])
+            groups.setdefault(release_notes_group(mr['labels']), []).append(mr)
+
+    print(f"## {title}\n")
+    ordered = [label for label in RELEASE_NOTES_LABELS if label in groups]
+    ordered += sorted((label for label in groups if label not in ordered), key=lambda label: (label == 'Other', label.lower()))
+    for label in ordered:
+        print(f"### {label}")
+        for mr in groups[label]:
+            print(f"- {mr['title']} (!{mr['iid']}, @{mr['author']})")
+        print()
+    if direct:
+        print("### Direct commits")
+        for sha in direct:
+            print(f"- {titles.get(sha, '')} ({sha[:8]})")
+        print()
+    print(f"{len(seen)} merge request(s), {len(commits)} commit(s)")
+
+CLEANUP_STALE_DAYS = 90
+CLEANUP_BATCH_SIZE = 20
+CLEANUP_BATCH_PAUSE = 1.0
+
+def get_paginated_concurrent(url, params=None, session=None, max_workers=4):
+    """GET every page of a REST list endpoint, fetching pages after the first one concurrently.
+
+    GitLab leaves out X-Total-Pages for very large lists, then pages are read one by one.
+    """
+    session = session or requests.Session()
+    headers = {"Private-Token": GITLAB_TOKEN}
+    params = dict(params or {}, per_page=100)
+
+    response = session.get(url, headers=headers, params=dict(params, page=1), timeout=30)
+    response.raise_for_status()
+    total_pages = int(response.headers.get('X-Total-Pages') or 0)
+    if not total_pages and response.headers.get('X-Next-Page'):
+        return get_paginated(url, params, session)
+
+    def fetch(page):
+        page_response = session.get(url, headers=headers, params=dict(params, page=page), timeout=30)
+        page_response.raise_for_status()
+        return page_response.json()
+
+    items = response.json()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for page_items in executor.map(fetch, range(2, total_pages + 1)):
+            items.extend(page_items)
+    return items
+
+def find_stale_branches(project_id, days, session=None):
+    """Return branches to clean up as list of (branch, reason, open merge request or None).
+
+    A branch is stale when it is merged, its merge request was merged or closed at the branch's
+    current tip, or it had no commits for days. Stale branches with an open merge request are
+    abandoned MRs. Protected and default branches are never returned.
+    """
+    session = session or requests.Session()
+    project_url = f"{API_URL}/projects/{project_id}"
+
+    branches = get_paginated_concurrent(f"{project_url}/repository/branches", session=session)
+    branches = [b for b in branches if not b.get('protected') and not b.get('default')]
+    if not branches:
+        return []
+
+    # A merge request is updated on every push to its branch, so older ones can't belong to an existing branch
+    oldest_commit = min(b['commit']['committed_date'] for b in branches)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        merge_requests = dict(zip(('opened', 'merged', 'closed'), executor.map(
+            lambda state: get_paginated_concurrent(f"{project_url}/merge_requests", {
+                'state': state, 'updated_after': oldest_commit}, session),
+            ('opened', 'merged', 'closed'))))
+
+    open_mrs = {mr['source_branch']: mr for mr in merge_requests['opened']}
+    # Keyed by branch and head SHA, a branch can have several finished merge requests
+    finished_mrs = {}
+    for state in ('closed', 'merged'):
+        for mr in merge_requests[state]:
+            finished_mrs.setdefault((mr['source_branch'], mr.get('sha')), mr)
+
+    stale_before = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+    stale = []
+    for branch in branches:
+        name = branch['name']
+        last_commit = datetime.datetime.fromisoformat(branch['commit']['committed_date'].replace('Z', '+00:00'))
+        inactive = last_commit < stale_before
+        open_mr = open_mrs.get(name)
+
+        if open_mr:
+            if inactive and datetime.datetime.fromisoformat(open_mr['updated_at'].replace('Z', '+00:00')) < stale_before:
+                stale.append((name, f"merge request !{open_mr['iid']} abandoned, no activity since {last_commit:%Y-%m-%d}", open_mr))
+        elif branch.get('merged'):
+            stale.append((name, "merged", None))
+        elif (name, branch['commit']['id']) in finished_mrs:
+            # Only when nothing was pushed to the branch after its merge request was finished
+            mr = finished_mrs[(name, branch['commit']['id'])]
+            stale.append((name, f"merge request !{mr['iid']} {mr['state']}", None))
+        elif inactive:
+            stale.append((name, f"no activity since {last_commit:%Y-%m-%d}", None))
+    return stale
+
+def delete_branches(project_id, stale, session=None, batch_size=CLEANUP_BATCH_SIZE, pause=CLEANUP_BATCH_PAUSE):
+    """Delete stale branches (closing their abandoned merge requests first) in batches, pausing between
+    batches so the API rate limit isn't hit. Returns list of (branch, error) that failed."""
+    session = session or requests.Session()
+    headers = {"Private-Token": GITLAB_TOKEN}
+    project_url = f"{API_URL}/projects/{project_id}"
+
+    def delete(item):
+        name, _, open_mr = item
+        for attempt in range(3):
+            if open_mr:
+                response = session.put(f"{project_url}/merge_requests/{open_mr['iid']}", headers=headers,
+                                       json={'state_event': 'close'}, timeout=30)
+                if response.status_code == 429:
+                    time.sleep(int(response.headers.get('Retry-After') or 5))
+                    continue
+                if response.status_code != 200:
+                    return name, f"closing !{open_mr['iid']} failed with {response.status_code}"
+                open_mr = None
+
+            response = session.delete(f"{project_url}/repository/branches/{quote(name, safe='')}", headers=headers, timeout=30)
+            if response.status_code == 429:
+                time.sleep(int(response.headers.get('Retry-After') or 5))
+                continue
+            if response.status_code in (204, 404):
+                return name, None
+            return name, f"failed with {response.status_code}"
+        return name, "rate limited"
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for start in range(0, len(stale), batch_size):
+            if start:
+                time.sleep(pause)
+            for name, error in executor.map(delete, stale[start:start + batch_size]):
+                if error:
+                    failed.append((name, error))
+            print(f"   Processed {min(start + batch_size, len(stale))}/{len(stale)}...")
+    return failed
+
+def cleanup_branches(args):
+    """Find stale branches and abandoned merge requests, preview them and delete after confirmation."""
+    project_id = args.project_id or get_project_id()
+    days = args.stale_days
+    session = requests.Session()
+
+    print(f"🔍 Looking for branches that are merged, closed or inactive for {days} days...")
+    try:
+        stale = find_stale_branches(project_id, days, session)
+    except Exception as e:
+        print(f"Error listing branches: {str(e)}")
+        return
+    if not stale:
+        print("✨ Nothing to clean up.")
+        return
+
+    abandoned = sum(1 for _, _, open_mr in stale if open_mr)
+    print(f"\n🧹 {len(stale)} branch(es) to delete" + (f", {abandoned} abandoned merge request(s) to close:" if abandoned else ":"))
+    for name, reason, _ in stale:
+        print(f"   {name}  ({reason})")
+
+    if args.dry_run:
+        print("\nDry run, nothing was deleted.")
+        return
+    if not args.yes:
+        if not sys.stdin.isatty():
+            print("\nNot deleting without a terminal to confirm, pass --yes.")
+            return
+        answer = inquirer.prompt([inquirer.Confirm('confirm', message=f"Delete {len(stale)} branch(es)?", default=False)])
+        if not answer or not answer['confirm']:
+            return
+
+    failed = delete_branches(project_id, stale, session)
+    print(f"\n✅ Deleted {len(stale) - len(failed)} branch(es).")
+    for name, error in failed:
+        print(f"   ❌ {name}: {error}")
+    print("Run `git fetch --prune` to drop them from your local clone too.")
+
 def main():
     global MAIN_BRANCH
 
@@ -745,6 +2294,29 @@ def main():
     parser.add_argument("--only_issue", action="store_true", help="Add this flag if you don't want to create merge request and branch alongside issue")
     parser.add_argument("-am", "--auto_merge", action="store_true", help="Add this flag to review if you want to set merge request to auto merge when pipeline succeeds")
     parser.add_argument("--select", action="store_true", help="Manually select reviewers for merge request (interactive)")
+    parser.add_argument("--full_review", action="store_true", help="With 'review': AI review all branch changes, not only commits since the last AI review")
+    parser.add_argument("--resolve_stale", action="store_true", help="With 'review': resolve earlier AI review threads on lines that are no longer changed")
+    parser.add_argument("--stream", action="store_true", help="With 'review' or 'ai review': show and post AI review findings while the model is still generating")
+    parser.add_argument("--all", action="store_true", help="With 'last deploy' or 'deploy history': include every project in productionMappings. With 'ai review': review every open merge request of project")
+    parser.add_argument("--remote", action="store_true", help="With 'review': AI review the merge request diff from GitLab API instead of the local checkout")
+    parser.add_argument("--mr", type=int, help="With 'ai review': review merge request with this iid from GitLab API and post findings to it, no checkout needed")
+    parser.add_argument("--team", action="store_true", help="With 'ai review --all': only merge requests that have one of the configured reviewers")
+    parser.add_argument("--workers", type=int, default=3, help="With 'ai review --all': how many merge requests to review at once")
+    parser.add_argument("--days", type=int, default=30, help="With 'deploy history': how many days of history to show")
+    parser.add_argument("--stale_days", type=int, default=CLEANUP_STALE_DAYS, help="With 'cleanup': days without activity after which a branch is stale")
+    parser.add_argument("--pending", action="store_true", help="With 'release notes': changes between last production deploy and HEAD")
+    parser.add_argument("--dry_run", action="store_true", help="With 'cleanup': only list what would be deleted")
+    parser.add_argument("--yes", action="store_true", help="With 'cleanup': delete without asking for confirmation")
+    parser.add_argument("--template", type=str, help="Name of issue template to use instead of prompting")
+    parser.add_argument("--milestone_id", type=str, help="Id or title of milestone to use instead of prompting, or 'current'. With 'time report': milestone to report on")
+    parser.add_argument("--iteration", type=str, help="Id of iteration to use instead of prompting, or 'current'. With 'time report': iteration to report on")
+    parser.add_argument("--epic_id", type=str, help="Id or title of epic to use instead of prompting")
+    parser.add_argument("--estimate", type=int, help="Estimated time in minutes, skips the estimate prompt")
+    parser.add_argument("--json", action="store_true", help="Print created issues and merge requests as JSON")
+    parser.add_argument("--checkout", action="store_true", help="Fetch only the new branch and switch to it after merge request is created")
+    parser.add_argument("--reviewers", type=str, help="With 'review': comma separated usernames of reviewers to assign")
+    parser.add_argument("--least_loaded", type=int, metavar="N", help="With 'review': assign the N reviewers with the fewest open merge requests awaiting their review")
+    parser.add_argument("--background", action="store_true", help=argparse.SUPPRESS)
 
     # If no arguments passed, show help
     if len(sys.argv) <= 1:
@@ -752,6 +2324,19 @@ def main():
         exit(1)
 
     args = parser.parse_args()
+    if args.title[0] == 'completion':
+        print_completion_script(parser, args.title[1] if len(args.title) > 1 else 'bash')
+        return
+
+    if args.title[0] != 'queue':
+        check_write_queue()
+
+    # Completion offers titles as well as ids, network is needed only when a title was passed
+    if args.milestone_id and args.milestone_id != 'current' and not args.milestone_id.isdigit():
+        args.milestone_id = resolve_title_to_id(args.milestone_id, list_milestones(), 'milestone')
+    if args.epic_id and not args.epic_id.isdigit():
+        args.epic_id = resolve_title_to_id(args.epic_id, list_epics(), 'epic')
+
     if args.title[0] == 'report':
         parts = args.title
         if len(parts) != 3:
@@ -773,24 +2358,21 @@ def main():
         openMergeRequestInBrowser()
         return
     elif title == 'review':
-        track_issue_time()
-        reviewers = None
-        if getattr(args, "select", False):
-            reviewers = chooseReviewersManually()
-        addReviewersToMergeRequest(reviewers=reviewers)
-
-        # Run AI code review and post to MR
-        try:
-            from ai_code_review import run_review_for_mr
-            project_id = get_project_id()
-            mr_id = getActiveMergeRequestId()
-            run_review_for_mr(project_id, mr_id, GITLAB_TOKEN, API_URL)
-        except Exception as e:
-            print(f"AI review skipped: {e}")
-
-        if(args.auto_merge):
-            setMergeRequestToAutoMerge()
+        run_review_workflow(args)
+        return
+    elif title == 'queue':
+        show_write_queue()
         return
+    elif title in ('queue retry', 'queue drop'):
+        resolve_write_queue(title == 'queue retry')
+        return
+    elif title == 'queue flush':
+        sent = flush_write_queue(background=args.background)
+        if not args.background:
+            print(f"Sent {sent} queued write(s).")
+        return
+    elif title == 'watch':
+        sys.exit(watch_merge_request())
     elif title == 'summary':
         get_two_weeks_commits()
         return
@@ -798,15 +2380,51 @@ def main():
         generate_smart_summary()
         return
     elif title == 'last deploy':
-        get_last_production_deploy()
+        if args.all:
+            get_all_last_production_deploys()
+        else:
+            get_last_production_deploy()
+        return
+    elif title == 'deploy history':
+        show_deploy_history(args.all, args.days)
+        return
+    elif title == 'release notes':
+        show_release_notes(pending=args.pending)
+        return
+    elif title == 'cleanup':
+        cleanup_branches(args)
+        return
+    elif title == 'time report':
+        show_time_report(args)
         return
     elif title == 'ai review':
+        if args.all:
+            from ai_code_review import run_review_for_all_mrs
+            project_id = args.project_id or get_project_id()
+            reviewer_ids = REVIEWERS if args.team else None
+            sys.exit(0 if run_review_for_all_mrs(project_id, GITLAB_TOKEN, API_URL, reviewer_ids, args.workers) else 1)
+        if args.mr:
+            from ai_code_review import run_review_for_mr
+            project_id = args.project_id or get_project_id()
+            run_review_for_mr(project_id, args.mr, GITLAB_TOKEN, API_URL, full=args.full_review,
+                              resolve_stale=args.resolve_stale, stream=args.stream, remote=True)
+            return
         from ai_code_review import run_review
-        run_review()
+        run_review(stream=args.stream)
         return
 
+    # Without a terminal nothing can be prompted, so everything must come from flags
+    interactive = sys.stdin.isatty()
+
     # Get settings for issue from template
-    selectedSettings = getIssueSettings(select_template())
+    if args.template:
+        selectedSettings = getIssueSettings(args.template)
+        if selectedSettings is None:
+            exit(f"Unknown template: {args.template}")
+    elif interactive:
+        selectedSettings = getIssueSettings(select_template())
+    else:
+        exit("--template is required when running without a terminal")
 
     # If template is False, ask for each settings
     if not len(selectedSettings):
@@ -819,27 +2437,47 @@ def main():
     project_id = selectedSettings.get('projectIds') or args.project_id or get_project_id()
 
     milestone = False
-    if not args.no_milestone:
-        milestone = get_milestone(args.milestone)['id']
+    if args.milestone_id and args.milestone_id != 'current':
+        milestone = args.milestone_id
+    elif not args.no_milestone:
+        selected_milestone = get_milestone(args.milestone and interactive and not args.milestone_id)
+        if selected_milestone:
+            milestone = selected_milestone['id']
+        else:
+            print('No milestone covers today, creating issue without milestone.', file=sys.stderr)
 
     iteration = False
-    if not args.no_iteration:
-        # manual pick iteration
-        iteration = get_iteration(True)
+    if args.iteration == 'current':
+        iteration = getActiveIteration()
+    elif args.iteration:
+        iteration = {'id': args.iteration}
+    elif not args.no_iteration:
+        # manual pick iteration, current one when there is no terminal
+        iteration = get_iteration(interactive)
 
     epic = False
-    if not args.no_epic:
+    if args.epic_id:
+        epic = {'id': args.epic_id}
+    elif not args.no_epic and interactive:
         epic = get_epic()
 
+    estimated_time = args.estimate
+    if estimated_time is None and not interactive:
+        estimated_time = ''
+
     MAIN_BRANCH = getMainBranch()
 
     onlyIssue = selectedSettings.get('onlyIssue') or args.only_issue
 
+    created = []
     if type(project_id) == list:
         for id in project_id:
-            startIssueCreation(id, title, milestone, epic, iteration, selectedSettings, onlyIssue)
+            created.append(startIssueCreation(id, title, milestone, epic, iteration, selectedSettings, onlyIssue, estimated_time, args.json, args.checkout))
     else:
-        startIssueCreation(project_id, title, milestone, epic, iteration, selectedSettings, onlyIssue)
+        created.append(startIssueCreation(project_id, title, milestone, epic, iteration, selectedSettings, onlyIssue, estimated_time, args.json, args.checkout))
+
+    if args.json:
+        print(json.dumps(created, indent=2))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Read git metadata (HEAD, config, refs) straight from the .git directory, without spawning git.
+
+Every function returns None when the answer can't be read reliably (not a repository, config
+includes, url rewrites, reftable ref storage, ...), so callers can fall back to running git.
+"""
+import os
+import shutil
+
+_config_cache = {}
+
+def find_git_dirs(start=None):
+    """Return (git_dir, common_dir) of repository containing start directory, or (None, None).
+
+    git_dir holds HEAD of the current worktree, common_dir holds config and refs shared by all
+    worktrees. They are the same directory for a regular checkout.
+    """
+    if os.environ.get('GIT_DIR'):
+        git_dir = os.path.abspath(os.environ['GIT_DIR'])
+        return git_dir, _read_common_dir(git_dir)
+
+    path = os.path.abspath(start or os.getcwd())
+    while True:
+        dot_git = os.path.join(path, '.git')
+        if os.path.isdir(dot_git):
+            return dot_git, _read_common_dir(dot_git)
+        if os.path.isfile(dot_git):
+            # Worktree or submodule: .git is a file pointing to the real git dir
+            with open(dot_git, 'r') as f:
+                content = f.read().strip()
+            if content.startswith('gitdir:'):
+                git_dir = os.path.normpath(os.path.join(path, content[len('gitdir:'):].strip()))
+                return git_dir, _read_common_dir(git_dir)
+            return None, None
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None, None
+        path = parent
+
+def _read_common_dir(git_dir):
+    try:
+        with open(os.path.join(git_dir, 'commondir'), 'r') as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        return git_dir
+
+def _read_file(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _uses_reftable(common_dir):
+    """Reftable repositories keep refs in binary tables, HEAD file only points to a '.invalid' branch."""
+    values = _read_config_file(os.path.join(common_dir, 'config'))
+    return bool(values and values.get('extensions.refstorage', 'files') != 'files')
+
+def current_branch():
+    """Name of checked out branch, 'HEAD' when detached (like `git rev-parse --abbrev-ref HEAD`)."""
+    git_dir, common_dir = find_git_dirs()
+    if not git_dir or _uses_reftable(common_dir):
+        return None
+    head = _read_file(os.path.join(git_dir, 'HEAD'))
+    if head is None or head == 'ref: refs/heads/.invalid':
+        return None
+    if head.startswith('ref: refs/heads/'):
+        return head[len('ref: refs/heads/'):]
+    return 'HEAD'
+
+def resolve_ref(refname):
+    """SHA that ref points to, following symbolic refs, from loose ref files or packed-refs."""
+    git_dir, common_dir = find_git_dirs()
+    if not git_dir or _uses_reftable(common_dir):
+        return None
+
+    for _ in range(5):
+        # HEAD is per worktree, other refs are shared
+        ref_dir = git_dir if refname == 'HEAD' else common_dir
+        content = _read_file(os.path.join(ref_dir, refname))
+        if content is None:
+            return _read_packed_ref(common_dir, refname)
+        if not content.startswith('ref: '):
+            return content
+        refname = content[len('ref: '):]
+    return None
+
+def _read_packed_ref(common_dir, refname):
+    try:
+        with open(os.path.join(common_dir, 'packed-refs'), 'r') as f:
+            for line in f:
+                if line.startswith(('#', '^')):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == refname:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+def remote_head_branch(remote='origin'):
+    """Default branch of remote, read from refs/remotes/<remote>/HEAD symbolic ref."""
+    _, common_dir = find_git_dirs()
+    if not common_dir or _uses_reftable(common_dir):
+        return None
+    content = _read_file(os.path.join(common_dir, 'refs', 'remotes', remote, 'HEAD'))
+    prefix = f'ref: refs/remotes/{remote}/'
+    if content and content.startswith(prefix):
+        return content[len(prefix):]
+    return None
+
+def _config_paths(common_dir):
+    """Config files git reads, in order of increasing priority: system, global and repository.
+
+    Returns None when config also comes from somewhere that isn't a file read here.
+    """
+    if os.environ.get('GIT_CONFIG_PARAMETERS') or os.environ.get('GIT_CONFIG_COUNT'):
+        return None
+
+    paths = []
+    if not os.environ.get('GIT_CONFIG_NOSYSTEM'):
+        if os.environ.get('GIT_CONFIG_SYSTEM'):
+            paths.append(os.environ['GIT_CONFIG_SYSTEM'])
+        else:
+            paths.append('/etc/gitconfig')
+            # Git built with another prefix (Homebrew, ...) reads <prefix>/etc/gitconfig instead
+            git = shutil.which('git')
+            prefix = os.path.dirname(os.path.dirname(os.path.realpath(git))) if git else '/usr'
+            if prefix != '/usr':
+                paths.append(os.path.join(prefix, 'etc', 'gitconfig'))
+
+    if os.environ.get('GIT_CONFIG_GLOBAL'):
+        paths.append(os.environ['GIT_CONFIG_GLOBAL'])
+    else:
+        xdg_config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+        paths.append(os.path.join(xdg_config_home, 'git', 'config'))
+        paths.append(os.path.expanduser('~/.gitconfig'))
+
+    paths.append(os.path.join(common_dir, 'config'))
+    return paths
+
+def _read_config_file(path):
+    """Parsed config file, {} when it doesn't exist. Cached until the file changes."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+
+    cached = _config_cache.get(path)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+
+    try:
+        with open(path, 'r', errors='replace') as f:
+            values = _parse_config(f.read())
+    except OSError:
+        return {}
+    _config_cache[path] = ((stat.st_mtime_ns, stat.st_size), values)
+    return values
+
+def read_config():
+    """Parsed config as dict 'section.subsection.name' -> value, as git sees it in this repository.
+
+    Section and name are lowercased, subsection is kept as is, the same way git compares them.
+    System, global and repository config files are merged, later ones win. None is returned
+    when any of them includes other files, or config is also passed through environment.
+    """
+    _, common_dir = find_git_dirs()
+    if not common_dir or not os.path.exists(os.path.join(common_dir, 'config')):
+        return None
+    paths = _config_paths(common_dir)
+    if paths is None:
+        return None
+
+    values = {}
+    for path in paths:
+        file_values = _read_config_file(path)
+        if any(k.startswith(('include.', 'includeif.')) for k in file_values):
+            return None
+        values.update(file_values)
+    return values
+
+def _parse_config(text):
+    values = {}
+    section = None
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        i += 1
+        if not line or line[0] in '#;':
+            continue
+
+        if line.startswith('['):
+            header = line[1:line.index(']')] if ']' in line else line[1:]
+            if '"' in header:
+                name, subsection = header.split('"', 1)
+                subsection = subsection.rsplit('"', 1)[0].replace('\\"', '"').replace('\\\\', '\\')
+                section = f"{name.strip().lower()}.{subsection}"
+            else:
+                # Also covers deprecated [section.subsection] syntax, where subsection is lowercased
+                section = header.strip().lower()
+            remainder = line[line.index(']') + 1:].strip() if ']' in line else ''
+            if not remainder or remainder[0] in '#;':
+                continue
+            line = remainder
+
+        if section is None:
+            continue
+
+        if '=' in line:
+            name, raw_value = line.split('=', 1)
+        else:
+            name, raw_value = line, None
+
+        if raw_value is None:
+            value = 'true'
+        else:
+            # Backslash at end of line continues value on next line
+            while raw_value.rstrip().endswith('\\') and not raw_value.rstrip().endswith('\\\\') and i < len(lines):
+                raw_value = raw_value.rstrip()[:-1] + lines[i]
+                i += 1
+            value = _parse_config_value(raw_value)
+
+        values[f"{section}.{name.strip().lower()}"] = value
+    return values
+
+def _parse_config_value(raw_value):
+    value = ''
+    in_quotes = False
+    escapes = {'n': '\n', 't': '\t', 'b': '\b', '"': '"', '\\': '\\'}
+    i = 0
+    raw_value = raw_value.strip()
+    while i < len(raw_value):
+        char = raw_value[i]
+        if char == '\\' and i + 1 < len(raw_value):
+            value += escapes.get(raw_value[i + 1], raw_value[i + 1])
+            i += 2
+            continue
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char in '#;' and not in_quotes:
+            break
+        else:
+            value += char
+        i += 1
+    return value.rstrip() if not in_quotes else value
+
+def config_value(key):
+    """Value of config key like 'remote.origin.url', or None if missing or config can't be read."""
+    values = read_config()
+    if values is None:
+        return None
+    parts = key.split('.')
+    if len(parts) > 2:
+        key = f"{parts[0].lower()}.{'.'.join(parts[1:-1])}.{parts[-1].lower()}"
+    else:
+        key = key.lower()
+    return values.get(key)
+
+def remote_url(remote='origin'):
+    """URL of remote as `git remote get-url` would print it, None if url rewriting is configured."""
+    values = read_config()
+    if values is None or any(k.startswith('url.') for k in values):
+        return None
+    return values.get(f'remote.{remote}.url')